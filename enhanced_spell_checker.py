@@ -9,8 +9,9 @@ import os
 import re
 import pickle
 from glob import glob
+from itertools import chain
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from kannada_wx_converter import kannada_to_wx, is_kannada_text, wx_to_kannada
@@ -18,6 +19,9 @@ from kannada_wx_converter import kannada_to_wx, is_kannada_text, wx_to_kannada
 PARADIGM_CACHE_VERSION = 1
 PARADIGM_CACHE_FILE = os.path.join("paradigms", "all_words_cache.pkl")
 
+# Fallback tokenizer: runs of Kannada script or Latin letters
+_FALLBACK_TOKEN_RE = re.compile(r"[\u0C80-\u0CFF]+|[a-zA-Z]+")
+
 # ❌ REMOVED: Paradigm generator imports (not needed with pre-generated paradigms)
 # All paradigms are now pre-generated and stored in paradigms/all/ folder
 
@@ -36,6 +40,7 @@ class SimplifiedSpellChecker:
         print("=" * 70)
 
         self.tokenize_func = None
+        self.verbose = True  # Per-call step traces in check_text
         self._reset_paradigm_structures()
 
         # 1️⃣ Load tokenizer and dictionary
@@ -51,14 +56,25 @@ class SimplifiedSpellChecker:
     def _reset_paradigm_structures(self) -> None:
         """Reset dictionary caches"""
         self.all_words: set[str] = set()
-        # SPEED OPTIMIZATION: Index words by length for faster filtering
-        self.words_by_length: Dict[int, set[str]] = defaultdict(set)
+        # SPEED OPTIMIZATION: Index words by length and leading chars for faster filtering
+        # (length, lowercased first char) -> words; get_suggestions only keeps matching first chars
+        self.words_by_length_initial: Dict[Tuple[int, str], set[str]] = defaultdict(set)
+        # (length, lowercased first two chars) -> words; used when two chars must match
+        self.words_by_length_prefix2: Dict[Tuple[int, str], set[str]] = defaultdict(set)
+        self._indexes_frozen = False
 
     def _add_word_to_dictionary(self, word: str) -> None:
-        """Add word to dictionary with length indexing for fast lookups"""
+        """Add word to dictionary with length indexing for fast lookups
+
+        Safe after load_dictionary: frozen candidate indexes are thawed first.
+        """
         if word and word not in self.all_words:
+            if self._indexes_frozen:
+                self._thaw_candidate_indexes()
             self.all_words.add(word)
-            self.words_by_length[len(word)].add(word)
+            lowered = word.lower()
+            self.words_by_length_initial[(len(word), lowered[:1])].add(word)
+            self.words_by_length_prefix2[(len(word), lowered[:2])].add(word)
 
     def _load_dictionary_cache(self, directory_mtime: float) -> Tuple[bool, int]:
         """Load cached dictionary words if cache is fresh"""
@@ -169,8 +185,36 @@ class SimplifiedSpellChecker:
                     self._add_word_to_dictionary(word)
             print("  [dict] Loaded extended dictionary with length indexing")
 
+        self._freeze_candidate_indexes()
         print(f"\n  [total] {len(self.all_words):,} words")
 
+    def _freeze_candidate_indexes(self) -> None:
+        """Turn the candidate buckets into plain dicts of tuples once loading is done
+
+        The dictionary is static after load_dictionary, and get_suggestions only
+        iterates the buckets; tuples iterate faster and drop the per-set hash tables.
+        A later _add_word_to_dictionary call thaws them again.
+        """
+        self.words_by_length_initial = {
+            key: tuple(words) for key, words in self.words_by_length_initial.items()
+        }
+        self.words_by_length_prefix2 = {
+            key: tuple(words) for key, words in self.words_by_length_prefix2.items()
+        }
+        self._indexes_frozen = True
+
+    def _thaw_candidate_indexes(self) -> None:
+        """Restore mutable set buckets so words can be added after loading"""
+        initial: Dict[Tuple[int, str], set[str]] = defaultdict(set)
+        for key, words in self.words_by_length_initial.items():
+            initial[key].update(words)
+        prefix2: Dict[Tuple[int, str], set[str]] = defaultdict(set)
+        for key, words in self.words_by_length_prefix2.items():
+            prefix2[key].update(words)
+        self.words_by_length_initial = initial
+        self.words_by_length_prefix2 = prefix2
+        self._indexes_frozen = False
+
     def _scan_paradigm_files(self) -> Tuple[int, float]:
         """Load all surface forms from paradigms/all/ into the dictionary"""
         all_dir = os.path.join("paradigms", "all")
@@ -203,12 +247,22 @@ class SimplifiedSpellChecker:
                 return self.tokenize_func(text, lang="kn")
             except Exception:
                 pass
-        return re.findall(r"[\u0C80-\u0CFF]+|[a-zA-Z]+", text)
+        return _FALLBACK_TOKEN_RE.findall(text)
+
+    def is_known_word(self, word: str, kannada: Optional[bool] = None) -> bool:
+        """Return True if a single word is a dictionary surface form (Kannada or WX)
+
+        Pass kannada when the caller has already scanned the word for Kannada script.
+        """
+        if kannada is None:
+            kannada = is_kannada_text(word)
+        normalized = kannada_to_wx(word) if kannada else word
+        return normalized in self.all_words
 
     def edit_distance(self, s1: str, s2: str, max_dist: int = 3) -> int:
-        """Levenshtein distance with early exit optimization"""
+        """Levenshtein distance with early exit optimization (two rows, O(len(s2)) memory)"""
         if len(s1) < len(s2):
-            return self.edit_distance(s2, s1, max_dist)
+            s1, s2 = s2, s1
         
         # Early exit: if length difference > max_dist, distance will exceed max_dist
         len_diff = len(s1) - len(s2)
@@ -217,15 +271,19 @@ class SimplifiedSpellChecker:
         
         if not s2:
             return len(s1)
+        if s1 == s2:
+            return 0
 
         previous = list(range(len(s2) + 1))
         for i, c1 in enumerate(s1):
             current = [i + 1]
+            left = i + 1
             for j, c2 in enumerate(s2):
-                current.append(min(previous[j + 1] + 1, current[j] + 1, previous[j] + (c1 != c2)))
+                left = min(previous[j + 1] + 1, left + 1, previous[j] + (c1 != c2))
+                current.append(left)
             
-            # Early exit: if all values in current row exceed max_dist, stop
-            if all(val > max_dist for val in current):
+            # Early exit: once the whole row exceeds max_dist it can only grow
+            if min(current) > max_dist:
                 return max_dist + 1
             
             previous = current
@@ -239,13 +297,6 @@ class SimplifiedSpellChecker:
         word_len = len(word)
         word_lower = word.lower()
         
-        # OPTIMIZATION 1: Use length index to get only relevant candidates (FAST!)
-        # Instead of iterating 123k words, we only check a subset with similar lengths
-        length_delta = 2 if word_len < 6 else 1
-        candidates_by_length = []
-        for length in range(max(1, word_len - length_delta), word_len + length_delta + 1):
-            candidates_by_length.extend(self.words_by_length.get(length, []))
-        
         # Determine prefix length requirement (longer words require longer shared prefix)
         prefix_len = 1
         if word_len >= 5:
@@ -253,6 +304,27 @@ class SimplifiedSpellChecker:
         if word_len >= 8:
             prefix_len = 3
 
+        # OPTIMIZATION 1: Use length index to get only relevant candidates (FAST!)
+        # Instead of iterating 123k words, we only check a subset with similar lengths
+        # Buckets are walked in place rather than copied into one list per call.
+        # Every candidate length is >= prefix_len, so candidates whose first one or
+        # two chars differ are always rejected below; only matching buckets are visited.
+        length_delta = 2 if word_len < 6 else 1
+        if prefix_len >= 2:
+            bucket_prefix = word_lower[:2]
+            buckets = self.words_by_length_prefix2
+        else:
+            bucket_prefix = word_lower[:1]
+            buckets = self.words_by_length_initial
+        candidates_by_length = chain.from_iterable(
+            buckets[key]
+            for key in (
+                (length, bucket_prefix)
+                for length in range(max(1, word_len - length_delta), word_len + length_delta + 1)
+            )
+            if key in buckets
+        )
+
         # OPTIMIZATION 2: Prefix filtering for better accuracy
         candidates_filtered = []
         for candidate in candidates_by_length:
@@ -287,15 +359,16 @@ class SimplifiedSpellChecker:
 
     def check_text(self, text: str) -> List[Dict[str, List[str]]]:
         """Check text for spelling errors"""
-        print(f"\n{'=' * 70}")
-        print(f"Processing: {text[:50]}...")
-        print(f"{'=' * 70}")
-
-        print("\n[step 0] Tokenizing original text ...")
+        verbose = self.verbose
+        if verbose:
+            print(f"\n{'=' * 70}")
+            print(f"Processing: {text[:50]}...")
+            print(f"{'=' * 70}")
+            print("\n[step 0] Tokenizing original text ...")
         tokens = self.tokenize(text)
-        print(f"  tokens: {tokens}")
-
-        print("\n[step 1] Normalizing tokens to WX ...")
+        if verbose:
+            print(f"  tokens: {tokens}")
+            print("\n[step 1] Normalizing tokens to WX ...")
         token_infos: List[tuple[str, str, bool]] = []
         normalized_tokens: List[str] = []
         for token in tokens:
@@ -303,9 +376,9 @@ class SimplifiedSpellChecker:
             normalized = kannada_to_wx(token) if token_is_kannada else token
             token_infos.append((token, normalized, token_is_kannada))
             normalized_tokens.append(normalized)
-        print(f"  normalized: {normalized_tokens}")
-
-        print("\n[step 2] Checking ...")
+        if verbose:
+            print(f"  normalized: {normalized_tokens}")
+            print("\n[step 2] Checking ...")
         errors: List[Dict[str, List[str]]] = []
 
         for original, normalized, token_is_kannada in token_infos:
@@ -313,6 +386,8 @@ class SimplifiedSpellChecker:
                 continue
 
             if normalized in self.all_words:
+                if not verbose:
+                    continue
                 if original != normalized:
                     print(f"  [ok] {original} ({normalized}): in dictionary")
                 else:
@@ -331,8 +406,9 @@ class SimplifiedSpellChecker:
                     deduped.append(suggestion)
                     seen.add(suggestion)
 
-            display = ", ".join(deduped[:5]) if deduped else "No suggestions"
-            print(f"  [miss] {original}: {display}")
+            if verbose:
+                display = ", ".join(deduped[:5]) if deduped else "No suggestions"
+                print(f"  [miss] {original}: {display}")
             errors.append({"word": original, "suggestions": deduped})
 
         return errors
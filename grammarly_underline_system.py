@@ -532,6 +532,8 @@ class UnderlineOverlayWindow:
         self._sync_thread: Optional[threading.Thread] = None
         self._ui_thread_id = threading.get_ident()
         self._pending_redraw = False
+        self._last_redraw = 0.0
+        self.min_redraw_interval = 1 / 30  # Cap repaints at ~30 fps during bursts
         self.underline_thickness_px = max(1, self.dpi_scaler.px(1.2))
         self.wave_amplitude_px = max(1, self.dpi_scaler.px(2))
         self.wave_wavelength_px = max(2, self.dpi_scaler.px(4))
@@ -594,16 +596,27 @@ class UnderlineOverlayWindow:
                 print(f"⚠️ Unable to marshal overlay call: {dispatch_error}")
 
     def _schedule_redraw(self):
-        """Coalesce redraw requests so canvas ops stay on the Tk thread."""
+        """Coalesce redraw requests (at most ~30 fps) so canvas ops stay on the Tk thread."""
         if self._pending_redraw:
             return
 
         def do_redraw():
             self._pending_redraw = False
+            self._last_redraw = time.monotonic()
             self._redraw_underlines()
 
         self._pending_redraw = True
-        self._run_on_ui_thread(do_redraw)
+        wait = self.min_redraw_interval - (time.monotonic() - self._last_redraw)
+        if wait <= 0:
+            self._run_on_ui_thread(do_redraw)
+            return
+        try:
+            # The timer fires on the Tk thread, where _run_on_ui_thread runs do_redraw
+            # inline under its exception guard
+            self.root.after(max(1, int(wait * 1000)), self._run_on_ui_thread, do_redraw)
+        except Exception as dispatch_error:
+            self._pending_redraw = False
+            print(f"⚠️ Unable to schedule overlay redraw: {dispatch_error}")
     
     def add_underline(
         self,
@@ -641,6 +654,22 @@ class UnderlineOverlayWindow:
         # Redraw all underlines from the Tk thread
         self._schedule_redraw()
     
+    def add_underlines(self, batch: List[dict]):
+        """Add several underlines (each dict holds add_underline's kwargs) with one redraw."""
+        with self.lock:
+            for spec in batch:
+                self.underlines[spec['word_id']] = {
+                    'x': spec['word_x'],
+                    'y': spec['word_y'],
+                    'width': spec['word_width'],
+                    'color': spec.get('color', "#FF0000"),
+                    'style': spec.get('style', "wavy"),
+                    'hwnd': spec.get('hwnd') or self.target_hwnd,
+                    'canvas_id': None
+                }
+
+        self._schedule_redraw()
+    
     def remove_underline(self, word_id: str):
         """Remove a specific underline"""
         with self.lock:
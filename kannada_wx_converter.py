@@ -238,6 +238,10 @@ def wx_to_kannada(text):
     
     return ''.join(result)
 
+# Kannada Unicode block U+0C80..U+0CFF (inclusive) as a set, for C-level membership scans.
+# Shared with smart_keyboard_service so both modules agree on what counts as Kannada.
+KANNADA_BLOCK_CHARS = frozenset(chr(c) for c in range(0x0C80, 0x0D00))
+
 def is_kannada_text(text):
     """
     Check if text contains Kannada Unicode characters
@@ -248,8 +252,10 @@ def is_kannada_text(text):
     Returns:
         bool: True if text contains Kannada characters
     """
-    kannada_range = range(0x0C80, 0x0CFF)  # Kannada Unicode block
-    return any(ord(char) in kannada_range for char in text)
+    if not text or text.isascii():
+        return False
+    # isdisjoint stops at the first Kannada character without a Python-level loop
+    return not KANNADA_BLOCK_CHARS.isdisjoint(text)
 
 def normalize_text(text):
     """
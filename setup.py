@@ -45,6 +45,7 @@ def install_dependencies():
     optional_packages = [
         ('pystray', 'System tray icon (optional)'),
         ('pillow', 'Image support (optional)'),
+        ('regex', 'Faster Unicode tokenization (optional)'),
     ]
     
     print("Installing required packages...\n")
@@ -28,7 +28,13 @@ import os
 import time
 import uuid
 import threading
+import queue
+import unicodedata
 import tkinter as tk
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from difflib import SequenceMatcher
 import ctypes
 from ctypes import wintypes, windll, byref, Structure, c_long, c_ulong, c_short, pointer, POINTER, sizeof, create_unicode_buffer
 from win32api import GetCursorPos
@@ -37,7 +43,7 @@ import win32clipboard
 import re
 import win32gui
 import win32con
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Iterable, Iterator, Set
 
 from dpi_utils import DPIScaler
 
@@ -46,6 +52,24 @@ try:
 except ImportError:
     Dispatch = None  # Word COM automation is optional
 
+try:
+    import regex  # Faster Unicode tokenization on large pastes (optional)
+except ImportError:
+    regex = None
+
+# Whole tokens that contain at least one Kannada code point. The lookbehind pins
+# attempts to token starts, so ASCII-only tokens are rejected in a single scan.
+_KANNADA_WORD_PATTERN = r'(?<![^\s.,!?;:])(?=[^\s.,!?;:]*[\u0C80-\u0CFF])[^\s.,!?;:]+'
+
+if regex is not None:
+    _WORD_RE = regex.compile(r'[^\s.,!?;:]+', regex.V1)
+    _KANNADA_WORD_RE = regex.compile(_KANNADA_WORD_PATTERN, regex.V1)
+    _TRAILING_PUNCT_RE = regex.compile(r'[.,!?;:]+$', regex.V1)
+else:
+    _WORD_RE = re.compile(r'[^\s\n\r\t.,!?;:]+')
+    _KANNADA_WORD_RE = re.compile(_KANNADA_WORD_PATTERN)
+    _TRAILING_PUNCT_RE = re.compile(r'[.,!?;:]+$')
+
 try:
     ctypes.windll.shcore.SetProcessDpiAwareness(2)
 except AttributeError:
@@ -83,8 +107,181 @@ class GUITHREADINFO(Structure):
     ]
 
 
+SMTO_BLOCK = 0x0001
+SMTO_ABORTIFHUNG = 0x0002
+
+# Private prototype so argtypes don't leak onto the shared windll.user32 function
+_SendMessageTimeoutW = ctypes.WINFUNCTYPE(
+    wintypes.LPARAM,
+    wintypes.HWND,
+    wintypes.UINT,
+    wintypes.WPARAM,
+    wintypes.LPARAM,
+    wintypes.UINT,
+    wintypes.UINT,
+    POINTER(ctypes.c_size_t),
+)(("SendMessageTimeoutW", windll.user32))
+
+
+def get_edit_selection(hwnd: int) -> Tuple[int, int]:
+    """Return (start, end) of an edit control's selection.
+
+    Uses the packed EM_GETSEL return value (no pointer marshalling); falls back
+    to the out-parameter form when an offset exceeds 65535 and the packed value is -1.
+    """
+    packed = windll.user32.SendMessageW(hwnd, win32con.EM_GETSEL, 0, 0)
+    if packed != -1:
+        return packed & 0xFFFF, (packed >> 16) & 0xFFFF
+    start = wintypes.DWORD()
+    end = wintypes.DWORD()
+    windll.user32.SendMessageW(hwnd, win32con.EM_GETSEL, byref(start), byref(end))
+    return int(start.value), int(end.value)
+
+
+def send_message_timeout(hwnd: int, msg: int, wparam: int = 0, lparam: int = 0, timeout_ms: int = 50) -> Optional[int]:
+    """SendMessage that gives up after timeout_ms (or if the target is hung); None on failure."""
+    result = ctypes.c_size_t()
+    if not _SendMessageTimeoutW(hwnd, msg, wparam, lparam, SMTO_ABORTIFHUNG | SMTO_BLOCK, timeout_ms, byref(result)):
+        return None
+    return result.value
+
+
+# ---------------------------------------------------------------------------
+# Cached measurement state (DPI scale and text widths), reset on foreground change
+# ---------------------------------------------------------------------------
+# Foreground changes only record the hwnd and bump a generation; the measuring
+# code drops its own caches when it sees a new generation. No DCs are cached:
+# GetDC/ReleaseDC must pair on one thread, so each measurement releases its own.
+_fg_lock = threading.Lock()
+_cached_foreground_hwnd: Optional[int] = None
+_foreground_generation = 0
+_gdi_cache_lock = threading.Lock()
+_gdi_cache_generation = 0
+_dpi_cache: Dict[str, float] = {}
+# Raw GDI text extents keyed by (font handle, text); shared by measure_text_width
+# and the Notepad layout pass, which measure on differently prepared DCs
+_WIDTH_CACHE_SIZE = 4096
+_width_cache: "OrderedDict[Tuple[int, str], int]" = OrderedDict()
+OBJ_FONT = 6
+
+
+def _note_foreground_window(hwnd: Optional[int]):
+    """Record a foreground window change; safe to call from the WinEvent hook thread."""
+    global _cached_foreground_hwnd, _foreground_generation
+    with _fg_lock:
+        if hwnd == _cached_foreground_hwnd:
+            return
+        _cached_foreground_hwnd = hwnd
+        _foreground_generation += 1
+
+
+def _sync_measurement_caches():
+    """Drop the DPI and width caches if the foreground window changed since they were filled."""
+    global _gdi_cache_generation
+    generation = _foreground_generation
+    if generation == _gdi_cache_generation:
+        return
+    with _gdi_cache_lock:
+        if generation != _gdi_cache_generation:
+            _dpi_cache.clear()
+            _width_cache.clear()
+            _gdi_cache_generation = generation
+
+
+# ---------------------------------------------------------------------------
+# Foreground window tracking via a WinEvent hook (avoids per-keystroke syscalls)
+# ---------------------------------------------------------------------------
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+WM_QUIT = 0x0012
+
+WinEventProcType = ctypes.WINFUNCTYPE(
+    None,
+    wintypes.HANDLE,
+    wintypes.DWORD,
+    wintypes.HWND,
+    wintypes.LONG,
+    wintypes.LONG,
+    wintypes.DWORD,
+    wintypes.DWORD,
+)
+
+_fg_hook_active = False
+_fg_hook_thread: Optional[threading.Thread] = None
+_fg_hook_thread_id = 0
+_fg_hook_proc = None  # Keep a reference so the callback is not garbage collected
+
+
+def get_foreground_hwnd() -> int:
+    """Return the foreground window, served from the WinEvent hook cache when active."""
+    if _fg_hook_active and _cached_foreground_hwnd:
+        return _cached_foreground_hwnd
+    hwnd = windll.user32.GetForegroundWindow()
+    _note_foreground_window(hwnd)
+    return hwnd
+
+
+def _on_foreground_event(hWinEventHook, event, hwnd, idObject, idChild, dwEventThread, dwmsEventTime):
+    if hwnd:
+        _note_foreground_window(hwnd)
+
+
+def _foreground_hook_loop(ready: threading.Event):
+    """Install the EVENT_SYSTEM_FOREGROUND hook and pump messages for it."""
+    global _fg_hook_active, _fg_hook_proc, _fg_hook_thread_id
+    user32 = windll.user32
+    _fg_hook_thread_id = windll.kernel32.GetCurrentThreadId()
+    _fg_hook_proc = WinEventProcType(_on_foreground_event)
+    hook = user32.SetWinEventHook(
+        EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, 0, _fg_hook_proc, 0, 0, WINEVENT_OUTOFCONTEXT
+    )
+    if not hook:
+        print("Foreground hook unavailable; falling back to GetForegroundWindow polling")
+        ready.set()
+        return
+
+    _note_foreground_window(user32.GetForegroundWindow())
+    _fg_hook_active = True
+    ready.set()
+    msg = wintypes.MSG()
+    try:
+        while user32.GetMessageW(byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(byref(msg))
+            user32.DispatchMessageW(byref(msg))
+    finally:
+        _fg_hook_active = False
+        user32.UnhookWinEvent(hook)
+
+
+def start_foreground_hook():
+    """Start the foreground WinEvent hook thread (no-op if already running)."""
+    global _fg_hook_thread
+    if _fg_hook_thread and _fg_hook_thread.is_alive():
+        return
+    ready = threading.Event()
+    _fg_hook_thread = threading.Thread(target=_foreground_hook_loop, args=(ready,), daemon=True)
+    _fg_hook_thread.start()
+    ready.wait(1.0)
+
+
+def stop_foreground_hook():
+    """Ask the hook thread to exit its message loop and unhook."""
+    global _fg_hook_active
+    _fg_hook_active = False
+    if _fg_hook_thread and _fg_hook_thread.is_alive() and _fg_hook_thread_id:
+        try:
+            windll.user32.PostThreadMessageW(_fg_hook_thread_id, WM_QUIT, 0, 0)
+        except Exception:
+            pass
+
+
 def get_dpi_scale():
     """Get DPI scaling factor for proper positioning across different displays"""
+    _sync_measurement_caches()
+    scale = _dpi_cache.get('scale')
+    if scale is not None:
+        return scale
+
     try:
         windll.shcore.SetProcessDpiAwareness(2)
     except Exception:
@@ -98,19 +295,47 @@ def get_dpi_scale():
         dpi = windll.gdi32.GetDeviceCaps(hdc, 88)
         windll.user32.ReleaseDC(0, hdc)
         scale = dpi / 96.0
-        return scale
     except Exception:
         return 1.0
+    _dpi_cache['scale'] = scale
+    return scale
+
+
+# Private typed prototypes for the caret query (same approach as _SendMessageTimeoutW)
+_GetWindowThreadProcessId = ctypes.WINFUNCTYPE(
+    wintypes.DWORD, wintypes.HWND, POINTER(wintypes.DWORD),
+)(("GetWindowThreadProcessId", windll.user32))
+_GetGUIThreadInfo = ctypes.WINFUNCTYPE(
+    wintypes.BOOL, wintypes.DWORD, POINTER(GUITHREADINFO),
+)(("GetGUIThreadInfo", windll.user32))
+_ClientToScreen = ctypes.WINFUNCTYPE(
+    wintypes.BOOL, wintypes.HWND, POINTER(POINT),
+)(("ClientToScreen", windll.user32))
+
+# Last caret answer as (hwnd, monotonic time, (x, y)); reused for CARET_CACHE_TTL seconds
+CARET_CACHE_TTL = 0.05
+_caret_cache: Optional[Tuple[int, float, Tuple[int, int]]] = None
+
+
+def invalidate_caret_cache():
+    """Forget the cached caret position (call whenever input may have moved it)."""
+    global _caret_cache
+    _caret_cache = None
 
 
 def get_caret_position():
     """Get the screen position of the text caret (insertion point) with DPI awareness"""
+    global _caret_cache
     try:
-        hwnd = windll.user32.GetForegroundWindow()
-        thread_id = windll.user32.GetWindowThreadProcessId(hwnd, 0)
+        hwnd = get_foreground_hwnd()
+        now = time.monotonic()
+        cached = _caret_cache
+        if cached is not None and cached[0] == hwnd and now - cached[1] < CARET_CACHE_TTL:
+            return cached[2]
+        thread_id = _GetWindowThreadProcessId(hwnd, None)
 
         gui_info = GUITHREADINFO(cbSize=sizeof(GUITHREADINFO))
-        result = windll.user32.GetGUIThreadInfo(thread_id, byref(gui_info))
+        result = _GetGUIThreadInfo(thread_id, byref(gui_info))
 
         if not result:
             return GetCursorPos()
@@ -124,12 +349,39 @@ def get_caret_position():
 
         caret_rect = gui_info.rcCaret
         point = POINT(caret_rect.left, caret_rect.bottom)
-        windll.user32.ClientToScreen(caret_hwnd, byref(point))
-        return (point.x, point.y)
+        _ClientToScreen(caret_hwnd, byref(point))
+        position = (point.x, point.y)
+        _caret_cache = (hwnd, now, position)
+        return position
     except Exception:
         return GetCursorPos()
 
 
+class SIZE(Structure):
+    _fields_ = [("cx", c_long), ("cy", c_long)]
+
+
+def _text_extent(hdc: int, text: str, size: Optional[SIZE] = None) -> Optional[int]:
+    """Raw pixel width of text in the font selected into hdc, via the shared width cache.
+
+    Callers run _sync_measurement_caches first. Returns None if GDI cannot measure.
+    """
+    cache_key = (windll.gdi32.GetCurrentObject(hdc, OBJ_FONT), text)
+    with _gdi_cache_lock:
+        cached = _width_cache.get(cache_key)
+        if cached is not None:
+            _width_cache.move_to_end(cache_key)
+            return cached
+    size = size or SIZE()
+    if not windll.gdi32.GetTextExtentPoint32W(hdc, text, len(text), byref(size)) or size.cx <= 0:
+        return None
+    with _gdi_cache_lock:
+        _width_cache[cache_key] = size.cx
+        if len(_width_cache) > _WIDTH_CACHE_SIZE:
+            _width_cache.popitem(last=False)
+    return size.cx
+
+
 def measure_text_width(text: str, hwnd: Optional[int] = None) -> int:
     """Measure the pixel width of text, particularly for Kannada characters"""
     if text is None:
@@ -137,21 +389,20 @@ def measure_text_width(text: str, hwnd: Optional[int] = None) -> int:
 
     try:
         if not hwnd:
-            hwnd = windll.user32.GetForegroundWindow()
+            hwnd = get_foreground_hwnd()
 
+        _sync_measurement_caches()
+        # Acquire and release the DC within this call, on this thread
         hdc = windll.user32.GetDC(hwnd)
         if not hdc:
             return len(text) * 12
-
-        class SIZE(Structure):
-            _fields_ = [("cx", c_long), ("cy", c_long)]
-
-        size = SIZE()
-        windll.gdi32.GetTextExtentPoint32W(hdc, text, len(text), byref(size))
-        windll.user32.ReleaseDC(hwnd, hdc)
+        try:
+            extent = _text_extent(hdc, text) or 0
+        finally:
+            windll.user32.ReleaseDC(hwnd, hdc)
 
         scale = get_dpi_scale()
-        width = int(size.cx / scale) if scale > 0 else size.cx
+        width = int(extent / scale) if scale > 0 else extent
         return max(width, len(text) * 8)
     except Exception:
         return len(text) * 12
@@ -162,7 +413,17 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import spell checker and Kannada utilities
 from enhanced_spell_checker import EnhancedSpellChecker
-from kannada_wx_converter import is_kannada_text
+from kannada_wx_converter import (
+    KANNADA_BLOCK_CHARS as _KANNADA_CHARS,
+    is_kannada_text as _has_kannada,  # cheap prefilter for any Kannada code point
+    wx_to_kannada,
+)
+
+
+def _canonical_word(word: str) -> str:
+    """NFC form of a word, so differently composed input shares one cache key."""
+    # normalize() quick-checks first and returns NFC input unchanged
+    return unicodedata.normalize('NFC', word)
 
 # Import Grammarly-style overlay helpers
 from grammarly_underline_system import (
@@ -180,6 +441,19 @@ except ImportError:
     print("Install: pip install pywin32 pynput")
     sys.exit(1)
 
+# Key groups tested on every keystroke
+_NAV_KEYS = frozenset({Key.up, Key.down, Key.home, Key.end, Key.page_up, Key.page_down})
+_CTRL_KEYS = frozenset({Key.ctrl_l, Key.ctrl_r})
+_SHIFT_KEYS = frozenset({Key.shift, Key.shift_r})
+_MODIFIER_KEYS = _CTRL_KEYS | _SHIFT_KEYS
+
+# Keys injected by replace_word, resolved once
+_BACKSPACE = Key.backspace
+_CTRL = Key.ctrl
+_SHIFT = Key.shift
+_LEFT = Key.left
+_DELETE = Key.delete
+
 
 # ---------------------------------------------------------------------------
 # Suggestion Popup UI (Tkinter overlay window)
@@ -200,6 +474,8 @@ class SuggestionPopup:
         self.root.attributes('-topmost', True)
         self.root.withdraw()
         self.suggestions = []
+        self._listed_items: Tuple[str, ...] = ()  # What the Listbox currently holds
+        self._placed_at: Optional[Tuple[int, int]] = None  # Last geometry offset sent to Tk
         self.selected = 0
         self.visible = False
         self.on_selection_callback = on_selection_callback
@@ -207,6 +483,12 @@ class SuggestionPopup:
         self.caret_tracker = caret_tracker
         self.dpi_scaler = dpi_scaler
         self.current_hwnd: Optional[int] = None
+        self._ui_thread_id = threading.get_ident()
+        self._withdraw_pending = False
+        # Latest show requested from another thread, and whether an idle callback is queued for it
+        self._show_lock = threading.Lock()
+        self._pending_show: Optional[List[str]] = None
+        self._show_posted = False
 
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self._on_window_close)
@@ -240,9 +522,14 @@ class SuggestionPopup:
             return
         self.suggestions = suggestions
         self.selected = 0
-        self.listbox.delete(0, tk.END)
-        for s in suggestions:
-            self.listbox.insert(tk.END, s)
+        items = tuple(suggestions)
+        if items != self._listed_items:
+            # Hand the whole list to Tk in a single insert command
+            self.listbox.delete(0, tk.END)
+            self.listbox.insert(tk.END, *items)
+            self._listed_items = items
+        else:
+            self.listbox.select_clear(0, tk.END)
         self.listbox.select_set(0)
         self.listbox.activate(0)
         
@@ -263,9 +550,13 @@ class SuggestionPopup:
         offset_y = self.dpi_scaler.px(5) if self.dpi_scaler else 5
         
         # Position popup slightly below and to the right of the caret
-        self.root.geometry(f"+{caret_x + offset_x}+{caret_y + offset_y}")
-        self.root.deiconify()
-        self.visible = True
+        position = (caret_x + offset_x, caret_y + offset_y)
+        if position != self._placed_at:
+            self.root.geometry(f"+{position[0]}+{position[1]}")
+            self._placed_at = position
+        if not self.visible:
+            self.root.deiconify()
+            self.visible = True
         self.root.lift()
         self.root.focus_force()
         try:
@@ -273,10 +564,58 @@ class SuggestionPopup:
         except Exception:
             self.current_hwnd = None
 
+    def post_show(self, suggestions):
+        """Show from any thread; the latest request wins and a later hide() cancels it."""
+        if threading.get_ident() == self._ui_thread_id:
+            with self._show_lock:
+                self._pending_show = None
+            self.show(suggestions)
+            return
+        with self._show_lock:
+            self._pending_show = list(suggestions)
+            if self._show_posted:
+                return
+            self._show_posted = True
+        try:
+            self.root.after_idle(self._show_pending)
+        except Exception:
+            with self._show_lock:
+                self._show_posted = False
+                self._pending_show = None
+
+    def _show_pending(self):
+        with self._show_lock:
+            # Clear the flag first so a request stored after this point posts a new callback
+            self._show_posted = False
+            suggestions, self._pending_show = self._pending_show, None
+        if suggestions:
+            self.show(suggestions)
+
     def hide(self):
-        self.root.withdraw()
+        with self._show_lock:
+            self._pending_show = None
+        if not self.visible:
+            # Already withdrawn, or a withdraw is already posted
+            return
         self.visible = False
         self.current_hwnd = None
+        if threading.get_ident() == self._ui_thread_id:
+            self.root.withdraw()
+            return
+        # Off the Tk thread: post one idle withdraw however many keys ask for it
+        if self._withdraw_pending:
+            return
+        self._withdraw_pending = True
+        try:
+            self.root.after_idle(self._withdraw_if_hidden)
+        except Exception:
+            self._withdraw_pending = False
+
+    def _withdraw_if_hidden(self):
+        self._withdraw_pending = False
+        if not self.visible:
+            # Skipped when show() ran before the idle callback fired
+            self.root.withdraw()
 
     def select_next(self):
         if not self.visible or not self.suggestions:
@@ -335,19 +674,128 @@ class SuggestionPopup:
 # ---------------------------------------------------------------------------
 # Smart Keyboard Service
 # ---------------------------------------------------------------------------
+_DIFF_BLOCK = 256
+
+
+def _common_prefix_len(a: str, b: str, limit: int) -> int:
+    """Length of the shared prefix of a and b (at most limit), compared block by block in C."""
+    i = 0
+    while i < limit:
+        j = min(i + _DIFF_BLOCK, limit)
+        if a[i:j] != b[i:j]:
+            # Mismatch is inside this block; walk it char by char
+            while a[i] == b[i]:
+                i += 1
+            return i
+        i = j
+    return limit
+
+
+def _common_suffix_len(a: str, b: str, limit: int) -> int:
+    """Length of the shared suffix of a and b (at most limit)."""
+    len_a = len(a)
+    len_b = len(b)
+    n = 0
+    while n < limit:
+        m = min(n + _DIFF_BLOCK, limit)
+        if a[len_a - m:len_a - n] != b[len_b - m:len_b - n]:
+            while a[len_a - 1 - n] == b[len_b - 1 - n]:
+                n += 1
+            return n
+        n = m
+    return limit
+
+
+class _WordBuffer:
+    """Edit buffer for the word being typed; words are short, so an immutable str is cheapest."""
+    __slots__ = ('_text',)
+
+    def __init__(self, text: str = ""):
+        self._text = text
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def as_str(self) -> str:
+        return self._text
+
+    def insert(self, index: int, text: str):
+        current = self._text
+        self._text = current[:index] + text + current[index:]
+
+    def delete(self, start: int, end: int) -> str:
+        """Remove chars [start, end) and return them."""
+        current = self._text
+        removed = current[start:end]
+        if removed:
+            self._text = current[:start] + current[end:]
+        return removed
+
+    def pop(self, index: int) -> str:
+        current = self._text
+        removed = current[index]
+        self._text = current[:index] + current[index + 1:]
+        return removed
+
+    def trim_front(self, limit: int) -> int:
+        """Drop leading chars beyond limit; return how many were dropped."""
+        overflow = len(self._text) - limit
+        if overflow <= 0:
+            return 0
+        self._text = self._text[overflow:]
+        return overflow
+
+
+class WordRec:
+    """Spell-check record for one Kannada word in the tracked document."""
+    __slots__ = ('word', 'corrected_word', 'suggestions', 'position', 'has_error', 'checked')
+
+    def __init__(self, word: str, suggestions: List[str], position: int, has_error: bool):
+        self.word = word
+        self.corrected_word = word  # Initially same as word
+        self.suggestions = suggestions
+        self.position = position
+        self.has_error = has_error
+        self.checked = True
+
+    def relocated(self, position: int) -> "WordRec":
+        """Return a copy of this record at a new document position."""
+        rec = WordRec(self.word, self.suggestions, position, self.has_error)
+        rec.corrected_word = self.corrected_word
+        rec.checked = self.checked
+        return rec
+
+
 class SmartKeyboardService:
     """Background service for Kannada word suggestion"""
+    _DELIMS = frozenset(' \n\r\t.,!?;:')
+
     def __init__(self):
         print("\n" + "="*70)
         print("Kannada Smart Keyboard Service - Suggestion Mode")
         print("="*70)
         
         self.spell_checker = EnhancedSpellChecker()
+        # check_text runs once per committed word here; its step traces would flood stdout
+        self.spell_checker.verbose = False
+        # LRU of misspelled word -> (suggestions, had_error); the dictionary is static after load
+        self._suggestion_cache: "OrderedDict[str, Tuple[List[str], bool]]" = OrderedDict()
+        self._suggestion_cache_size = 4096
+        self._suggestion_cache_lock = threading.Lock()
+        # Words already confirmed correct; bounded by the user's own vocabulary
+        self._known_correct: Set[str] = set()
+        # Interactive lookups wait at most suggestion_timeout; a word that overruns it
+        # finishes on the pool and is not resubmitted for slow_word_retry seconds
+        self.suggestion_timeout = 0.4
+        self.slow_word_retry = 5.0
+        self._slow_words: Dict[str, float] = {}
+        self._suggestion_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="suggest")
+        threading.Thread(target=self._warm_spell_checker, daemon=True).start()
         self.keyboard_controller = Controller()
         self.dpi = DPIScaler()
         self.caret_tracker = CaretTracker()  # Now with font metrics, DPI, and UI Automation
         self.popup = SuggestionPopup(
-            on_selection_callback=self.replace_word,
+            on_selection_callback=self.request_replacement,
             on_close_callback=self.on_popup_close,
             caret_tracker=self.caret_tracker,
             dpi_scaler=self.dpi,
@@ -361,6 +809,9 @@ class SmartKeyboardService:
         # Underline styling + relocation controls
         self.underline_focus_ratio = 0.45  # portion of the word width to underline (centered)
         self.underline_focus_min_px = self.dpi.px(28)
+        # Integer form of underline_focus_ratio for _compute_focus_span
+        self._focus_num, self._focus_den = round(self.underline_focus_ratio * 100), 100
+        self._focus_floor_px = max(1, self.underline_focus_min_px)
         self.underline_thickness_px = max(1, self.dpi.px(1.2))
         self.underline_offset_px = self.dpi.px(2)
         self.line0_underline_offset_px = self.dpi.px(6)  # Shared tweak for first-line underlines
@@ -368,37 +819,75 @@ class SmartKeyboardService:
 
         # Track all misspelled words with persistent underlines (keyed by unique underline id)
         self.misspelled_words = {}
+        # Coarse click hit-test grid: hwnd -> {(cell_x, cell_y): [underline ids]}
+        self._underline_grid: Dict[Optional[int], Dict[Tuple[int, int], List[str]]] = {}
+        self._underline_cells: Dict[str, Tuple[Optional[int], List[Tuple[int, int]]]] = {}
+        # Canonical word -> underline ids in insertion order (dict used as an ordered set)
+        self._underline_ids_by_word: Dict[str, Dict[str, None]] = {}
+        self._window_rect_cache: Dict[int, Tuple[float, Optional[Tuple[int, int, int, int]]]] = {}
         
-        # Document-wide word tracking dictionary
-        # Format: {word_index: {'word': str, 'corrected_word': str, 'suggestions': list, 
-        #                       'position': int, 'has_error': bool, 'checked': bool}}
-        self.document_words = {}  # Dictionary to store all words in document
-        self.word_index_counter = 0  # Counter for unique word indices
+        # Document-wide word tracking, in document order
+        self.document_words: List[WordRec] = []
+        # Inverted index: current text (corrected_word) -> indices into document_words
+        self._word_to_indices: Dict[str, List[int]] = {}
         self.underline_sequence = 0  # Counter for persistent underline ids
         self.document_text_cache = ""  # Cache of last known document text
         self.document_lock = threading.Lock()  # Lock for document_words access
         
-        self.caret_step_delay = 0.003
+        self.debug_keys = False  # Per-keystroke buffer tracing (stdout writes add input lag)
+
+        # Committed words are spell-checked off the keyboard hook by _suggestion_worker,
+        # which drains a typing burst once no new word arrives for check_debounce_delay.
+        self.check_debounce_delay = 0.02
+        # Items are (word, caret geometry captured when the word was committed)
+        self._check_q: "queue.Queue[Tuple[str, Optional[dict]]]" = queue.Queue()
+        self._check_worker: Optional[threading.Thread] = None
+        # Ctrl+V checks run on one persistent worker; items are monotonic due times
+        self.paste_settle_delay = 0.3
+        self._paste_q: "queue.Queue[float]" = queue.Queue()
+        self._paste_worker: Optional[threading.Thread] = None
+
+        # Raw key events from the pynput hook, processed in batches by _key_event_worker
+        # Items are (kind, key, snapshot); snapshot holds target-app state read in the hook
+        self._key_q: "queue.Queue[Tuple[str, object, Optional[dict]]]" = queue.Queue()
+        self._key_worker: Optional[threading.Thread] = None
+        # Ctrl state as seen by the hook itself; ctrl_held lags behind on the worker
+        self._hook_ctrl_down = False
+        self.key_batch_size = 32
+        # Set by the hook for every event it sees while replace_word is injecting keys
+        self._injected_activity = threading.Event()
+        self.injected_settle_gap = 0.03
+        self.injected_settle_max = 0.15
+        # Recent key-handler failures; reported once at shutdown instead of per keystroke
+        self._key_errors: "deque[str]" = deque(maxlen=20)
+        self._key_error_count = 0
+        self._paste_error_count = 0  # Paste-path failures; printed sparsely, see _log_paste_exception
         
-        self.current_word_chars = []  # Characters in the current word being typed/edited
+        self.current_word_chars = _WordBuffer()  # Characters in the current word being typed/edited
         self.cursor_index = 0  # Position within the current word buffer
         self.enabled = True
         self.words_checked = 0
         self.last_word = ""  # Store last word for replacement
         self.last_underline_id: Optional[str] = None  # Track specific underline instance
         self.running = False  # Service running flag
+        self._keyboard_listener = None
+        self._mouse_listener = None
+        self._ui_shutdown_done = False
         self.replacing = False  # Flag to prevent re-showing popup during replacement
         self.disable_scanning = False  # Skip key processing while programmatically inserting text
         self.just_replaced_word = False  # Track whether the last action was a replacement
-        self.last_esc_time = 0  # Track last Esc press for double-tap detection
+        self.last_esc_time = float("-inf")  # Monotonic time of last Esc press (double-tap detection)
         self.last_clipboard_content = ""  # Track clipboard for paste detection
+        self._clipboard_seq = 0  # GetClipboardSequenceNumber of the cached read below
+        self._clipboard_text: Optional[str] = None
         self.clipboard_check_active = False  # Flag to enable clipboard monitoring
         self.last_replacement_time = 0  # Track when last replacement happened
         self.last_replaced_word = ""  # Track what word was just replaced
+        self._buffer_dirty = False  # Buffer edited since the last delimiter check
         self.shift_pressed = False  # Track if shift key is held (for selections)
         self.selection_anchor = None  # Anchor position when starting a selection
         self.selection_range = None  # Tuple[int, int] for current selection within the word
-        self.last_committed_word_chars = []  # Snapshot of last word confirmed with delimiter
+        self.last_committed_word = ""  # Snapshot of last word confirmed with delimiter
         self.pending_restore = False  # Indicates buffer was just restored after delimiter
         self.trailing_delimiter_count = 0  # Number of consecutive delimiters after last word
         self.last_delimiter_char = ' '  # Track the delimiter that triggered suggestion
@@ -410,7 +899,7 @@ class SmartKeyboardService:
         self.default_text_margin_px = self.dpi.px(18)
         self.default_baseline_offset_px = self.dpi.px(32)
         self.default_line_height_px = max(self.dpi.px(28), 16)
-        self.paste_cooldown_until = 0.0  # Timestamp until per-key checks resume after paste
+        self.paste_cooldown_until = 0.0  # Monotonic time until per-key checks resume after paste
         self.layout_horizontal_padding_px = self.dpi.px(12)  # Safety padding when simulating client width
         self.layout_tab_stop_spaces = 4  # Approximate tab stop spacing (Notepad default = 8, but Kannada wider)
         self.layout_min_char_px = max(1, self.dpi.px(6))  # Guard for zero-width glyphs during layout
@@ -438,7 +927,7 @@ class SmartKeyboardService:
     
     def reset_current_word(self, preserve_delimiter=False, clear_marker=True):
         """Clear the tracked word buffer and reset caret index"""
-        self.current_word_chars = []
+        self.current_word_chars = _WordBuffer()
         self.cursor_index = 0
         self.selection_anchor = None
         self.selection_range = None
@@ -446,44 +935,58 @@ class SmartKeyboardService:
         self.restore_allowed = preserve_delimiter
         if not preserve_delimiter:
             self.trailing_delimiter_count = 0
-            self.last_committed_word_chars = []
+            self.last_committed_word = ""
             self.last_delimiter_char = ' '
 
     def sync_committed_buffer(self):
         """Keep committed snapshot aligned with current buffer"""
-        self.last_committed_word_chars = self.current_word_chars.copy()
+        self.last_committed_word = self.current_word_chars.as_str()
 
     def is_word_delimiter(self, char):
         """Check if character is a word boundary"""
         if not char:
             return True
-        return char in [' ', '\n', '\r', '\t', '.', ',', '!', '?', ';', ':']
+        return char in self._DELIMS
 
     def is_kannada_char(self, char):
         """Check if character is Kannada"""
-        return char and '\u0C80' <= char <= '\u0CFF'
+        return bool(char) and char in _KANNADA_CHARS
 
     def _compute_focus_span(self, word_width: int) -> Tuple[int, int]:
         """Return (focus_width, offset_from_word_start) for centered underline."""
         if word_width <= 0:
             return 0, 0
-        focus_width = max(1, int(word_width * self.underline_focus_ratio))
-        focus_width = max(self.underline_focus_min_px, focus_width)
-        focus_width = min(word_width, focus_width)
-        offset = max(0, (word_width - focus_width) // 2)
-        return focus_width, offset
-
-    def _maybe_remove_underline_after_edit(self, before_snapshot: str) -> bool:
+        focus_width = (word_width * self._focus_num) // self._focus_den
+        if focus_width < self._focus_floor_px:
+            focus_width = self._focus_floor_px
+        if focus_width > word_width:
+            focus_width = word_width
+        return focus_width, (word_width - focus_width) // 2
+
+    def _edit_caret_index(self, key_snapshot: Optional[dict]) -> Optional[int]:
+        """Caret index after an edit, preferring the one predicted in the hook."""
+        if key_snapshot is not None and 'caret_index' in key_snapshot:
+            return key_snapshot['caret_index']
+        return self._get_caret_char_index()
+
+    def _maybe_remove_underline_after_edit(
+        self,
+        before_snapshot: str,
+        after_snapshot: Optional[str] = None,
+        key_snapshot: Optional[dict] = None,
+    ) -> bool:
         """Remove underline if the misspelled word was completely deleted."""
         before = (before_snapshot or "").strip()
-        after = ''.join(self.current_word_chars).strip()
+        if after_snapshot is None:
+            after_snapshot = self.current_word_chars.as_str()
+        after = after_snapshot.strip()
         
         # If buffer is empty, check if we should remove the underline for the word that was there
         if not after:
             # Only remove underline if the deleted word was actually a Kannada word
-            if before and any(self.is_kannada_char(c) for c in before):
+            if before and _has_kannada(before):
                 print(f"Removing underline for deleted Kannada word '{before}'")
-                caret_index = self._get_caret_char_index()
+                caret_index = self._edit_caret_index(key_snapshot)
                 fallback_index = None
                 if caret_index is not None and len(before) > 1:
                     fallback_index = max(0, caret_index + len(before) - 1)
@@ -494,11 +997,11 @@ class SmartKeyboardService:
                 )
                 return True
             # Fallback for last committed word (only if it was Kannada)
-            if self.last_committed_word_chars:
-                last_word = ''.join(self.last_committed_word_chars).strip()
-                if last_word and any(self.is_kannada_char(c) for c in last_word):
+            if self.last_committed_word:
+                last_word = self.last_committed_word.strip()
+                if last_word and _has_kannada(last_word):
                     print(f"Removing underline for deleted Kannada word '{last_word}' (from last_committed)")
-                    caret_index = self._get_caret_char_index()
+                    caret_index = self._edit_caret_index(key_snapshot)
                     fallback_index = None
                     if caret_index is not None and len(last_word) > 1:
                         fallback_index = max(0, caret_index + len(last_word) - 1)
@@ -513,13 +1016,13 @@ class SmartKeyboardService:
         # If buffer still has content, only remove if word was completely replaced
         if before and len(after) < len(before) * 0.5:  # Word reduced by more than half
             # Only process Kannada words
-            if any(self.is_kannada_char(c) for c in before):
+            if _has_kannada(before):
                 # Check if current buffer is a prefix of the deleted word
                 if before.startswith(after):
                     # Word was partially deleted, but might still be there - don't remove yet
                     return False
                 # Word was replaced with something different - remove the old underline
-                caret_index = self._get_caret_char_index()
+                caret_index = self._edit_caret_index(key_snapshot)
                 fallback_index = None
                 if caret_index is not None and len(before) > 1:
                     fallback_index = max(0, caret_index + len(before) - 1)
@@ -547,16 +1050,19 @@ class SmartKeyboardService:
                 start_y = rect[1] + rel_y
         return start_x, start_y
 
-    def _remove_underlines_near_caret(self, tolerance: int = 8) -> bool:
-        """Remove underline markers that intersect the current caret location."""
+    def _remove_underlines_near_caret(self, tolerance: int = 8, caret_pos: Optional[Tuple[int, int]] = None) -> bool:
+        """Remove underline markers that intersect the caret (or ``caret_pos`` read in the hook)."""
 
         if self.current_interface == "Notepad":
             return False
 
-        try:
-            caret_x, caret_y = get_caret_position()
-        except Exception:
-            return False
+        if caret_pos is not None:
+            caret_x, caret_y = caret_pos
+        else:
+            try:
+                caret_x, caret_y = get_caret_position()
+            except Exception:
+                return False
 
         with self.underline_lock:
             underline_items = list(self.misspelled_words.items())
@@ -626,15 +1132,17 @@ class SmartKeyboardService:
         # Clear tracking dictionary
         with self.underline_lock:
             self.misspelled_words.clear()
+            self._grid_clear()
         
         # Clear document words cache
         with self.document_lock:
             self.document_words.clear()
+            self._word_to_indices.clear()
         
         # Reset word buffer and related state
-        self.current_word_chars = []
+        self.current_word_chars = _WordBuffer()
         self.cursor_index = 0
-        self.last_committed_word_chars = []
+        self.last_committed_word = ""
         self.last_word = ""
         self.last_underline_id = None
         
@@ -661,13 +1169,7 @@ class SmartKeyboardService:
             if not edit_hwnd:
                 return False
 
-            start = wintypes.DWORD()
-            end = wintypes.DWORD()
-
-            windll.user32.SendMessageW(edit_hwnd, win32con.EM_GETSEL, byref(start), byref(end))
-
-            selection_start = int(start.value)
-            selection_end = int(end.value)
+            selection_start, selection_end = get_edit_selection(edit_hwnd)
 
             text_length = windll.user32.SendMessageW(edit_hwnd, win32con.WM_GETTEXTLENGTH, 0, 0)
             if selection_end == 0xFFFFFFFF:
@@ -676,38 +1178,52 @@ class SmartKeyboardService:
             if selection_end < selection_start:
                 selection_start, selection_end = selection_end, selection_start
 
+            # Runs inside the keyboard hook, so the per-check detail is debug-only
+            debug = self.debug_keys
             if selection_end <= selection_start:
-                print(f"Select-all check: start={selection_start}, end={selection_end}, length={text_length} -> no selection")
+                if debug:
+                    print(f"Select-all check: start={selection_start}, end={selection_end}, length={text_length} -> no selection")
                 return False
 
             if text_length <= 0:
-                print(f"Select-all check: empty document (length={text_length})")
+                if debug:
+                    print(f"Select-all check: empty document (length={text_length})")
                 return False
 
             # Require selection from document start and covering (nearly) entire content
             if selection_start != 0:
-                print(f"Select-all check: selection does not start at 0 (start={selection_start})")
+                if debug:
+                    print(f"Select-all check: selection does not start at 0 (start={selection_start})")
                 return False
 
             if selection_end >= text_length:
-                print(f"Select-all check: full selection detected (length={text_length})")
+                if debug:
+                    print(f"Select-all check: full selection detected (length={text_length})")
                 return True
 
             # Some editors omit the final newline from the selection length; allow off-by-one in that case
             almost_full = text_length > 0 and (selection_end + 1) >= text_length
-            print(
-                f"Select-all check: nearly full={almost_full} (end={selection_end}, length={text_length})"
-            )
+            if debug:
+                print(
+                    f"Select-all check: nearly full={almost_full} (end={selection_end}, length={text_length})"
+                )
             return almost_full
         except Exception as exc:
             print(f"Full-selection detection failed: {exc}")
             return False
 
-    def _should_clear_select_all(self) -> bool:
-        """Return True if select-all deletion should clear overlay state."""
+    def _should_clear_select_all(self, snapshot: Optional[dict] = None) -> bool:
+        """Return True if select-all deletion should clear overlay state.
+
+        ``snapshot`` carries the selection read in the hook before the target app
+        handled the key; without it the selection is queried now.
+        """
         if self.select_all_active:
             return True
-        detected = self._has_full_document_selection()
+        if snapshot is not None and 'full_selection' in snapshot:
+            detected = snapshot['full_selection']
+        else:
+            detected = self._has_full_document_selection()
         if detected:
             print("Select-all detected via foreground selection")
         return detected
@@ -715,7 +1231,7 @@ class SmartKeyboardService:
     def _get_notepad_edit_hwnd(self) -> Optional[int]:
         """Return the HWND for Notepad's edit control if available."""
         try:
-            foreground = windll.user32.GetForegroundWindow()
+            foreground = get_foreground_hwnd()
             if not foreground:
                 return None
 
@@ -771,6 +1287,11 @@ class SmartKeyboardService:
 
     def _get_caret_char_index(self) -> Optional[int]:
         """Return insertion-point index within the focused edit control when available."""
+        selection = self._get_caret_selection()
+        return selection[1] if selection else None
+
+    def _get_caret_selection(self) -> Optional[Tuple[int, int]]:
+        """Return the (start, end) selection of the focused edit control when available."""
         candidate_hwnds: List[int] = []
 
         try:
@@ -792,12 +1313,9 @@ class SmartKeyboardService:
             if not hwnd or not win32gui.IsWindow(hwnd):
                 continue
             try:
-                start = wintypes.DWORD()
-                end = wintypes.DWORD()
-                windll.user32.SendMessageW(hwnd, win32con.EM_GETSEL, byref(start), byref(end))
-                caret_index = int(end.value)
+                selection_start, caret_index = get_edit_selection(hwnd)
                 if caret_index >= 0:
-                    return caret_index
+                    return selection_start, caret_index
             except Exception:
                 continue
         return None
@@ -952,7 +1470,7 @@ class SmartKeyboardService:
         last_hwnd = None
         while self.running:
             try:
-                hwnd = win32gui.GetForegroundWindow()
+                hwnd = get_foreground_hwnd()
                 if not hwnd:
                     time.sleep(0.5)
                     continue
@@ -962,6 +1480,7 @@ class SmartKeyboardService:
                 interface = self._classify_interface(class_name, title)
 
                 if interface != last_interface or hwnd != last_hwnd:
+                    _note_foreground_window(hwnd)
                     previous_interface = last_interface
                     previous_hwnd = last_hwnd
                     last_interface = interface
@@ -1042,6 +1561,107 @@ class SmartKeyboardService:
         else:
             self.keyboard_controller.type(delimiter)
     
+    def _build_underline_info(
+        self,
+        word: str,
+        suggestions: list,
+        caret_x: int,
+        caret_y: int,
+        word_width: int,
+        word_start_x: int,
+        *,
+        hwnd: Optional[int] = None,
+        text_hwnd: Optional[int] = None,
+        window_rect: Optional[Tuple[int, int, int, int]] = None,
+        relative_start_x: Optional[int] = None,
+        relative_y: Optional[int] = None,
+        caret_height: Optional[int] = None,
+        char_start: Optional[int] = None,
+        char_length: Optional[int] = None,
+    ) -> dict:
+        """Compute the stored underline record (everything except its id)."""
+        height = caret_height if caret_height and caret_height > 0 else self._get_caret_height(hwnd)
+        underline_offset = self._compute_underline_offset(height)
+        underline_y = caret_y + underline_offset
+
+        rect = window_rect
+        if hwnd and rect is None:
+            try:
+                rect = win32gui.GetWindowRect(hwnd)
+            except Exception:
+                rect = None
+
+        rel_start = relative_start_x
+        rel_y = relative_y
+        if rect:
+            if rel_start is None:
+                rel_start = word_start_x - rect[0]
+            if rel_y is None:
+                rel_y = underline_y - rect[1]
+
+        underline_padding = self._compute_underline_padding(height)
+        bbox = {
+            'left': word_start_x,
+            'top': underline_y - underline_padding,
+            'right': word_start_x + word_width,
+            'bottom': underline_y + underline_padding,
+        }
+
+        line_index = self._get_line_index_from_char(text_hwnd, char_start)
+        if line_index is None and char_start is not None and char_length:
+            try:
+                alt_index = max(0, char_start + char_length - 1)
+            except Exception:
+                alt_index = char_start
+            if alt_index is not None:
+                line_index = self._get_line_index_from_char(text_hwnd, alt_index)
+        if line_index is None:
+            try:
+                if rect and height:
+                    line_index = int(round((underline_y - rect[1]) / max(1, height)))
+                elif height:
+                    line_index = int(round(caret_y / max(1, height)))
+            except Exception:
+                line_index = None
+        if line_index is not None and line_index < 0:
+            line_index = 0
+
+        return {
+            'word': word,
+            'suggestions': suggestions,
+            'hwnd': hwnd,
+            'text_hwnd': text_hwnd,
+            'absolute_position': (word_start_x, underline_y),
+            'relative_start_x': rel_start,
+            'relative_y': rel_y,
+            'width': word_width,
+            'bbox': bbox,
+            'last_rect': rect,
+            'added_at': time.time(),
+            'caret_height': height,
+            'char_start': char_start,
+            'char_length': char_length if char_length is not None else len(word),
+            'line_index': line_index,
+        }
+
+    def _store_underline_info(self, underline_info: dict) -> str:
+        """Assign an id and register the record (caller must hold underline_lock)."""
+        word = underline_info['word']
+        underline_index = self.underline_sequence
+        self.underline_sequence += 1
+        uid = f"{word}-{underline_index:04d}-{uuid.uuid4().hex[:6]}"
+        underline_info['id'] = uid
+        self.misspelled_words[uid] = underline_info
+        self._underline_ids_by_word.setdefault(_canonical_word(word), {})[uid] = None
+        self._grid_insert(uid, underline_info)
+        return uid
+
+    def _ensure_overlay_for(self, hwnd: Optional[int]):
+        """Show the overlay over hwnd unless it is already tracking that window."""
+        needs_show = not self.underline_overlay.visible or not self._window_handles_match(self.active_overlay_hwnd, hwnd)
+        if needs_show:
+            self._show_overlay_for_hwnd(hwnd)
+
     def add_persistent_underline(
         self,
         word: str,
@@ -1067,87 +1687,34 @@ class SmartKeyboardService:
             style = "wavy"
 
             if draw_overlay:
-                needs_show = not self.underline_overlay.visible or not self._window_handles_match(self.active_overlay_hwnd, hwnd)
-                if needs_show:
-                    self._show_overlay_for_hwnd(hwnd)
+                self._ensure_overlay_for(hwnd)
 
-            height = caret_height if caret_height and caret_height > 0 else self._get_caret_height(hwnd)
-            underline_offset = self._compute_underline_offset(height)
-            underline_y = caret_y + underline_offset
-
-            rect = window_rect
-            if hwnd and rect is None:
-                try:
-                    rect = win32gui.GetWindowRect(hwnd)
-                except Exception:
-                    rect = None
-
-            rel_start = relative_start_x
-            rel_y = relative_y
-            if rect:
-                if rel_start is None:
-                    rel_start = word_start_x - rect[0]
-                if rel_y is None:
-                    rel_y = underline_y - rect[1]
-
-            underline_padding = self._compute_underline_padding(height)
-            bbox = {
-                'left': word_start_x,
-                'top': underline_y - underline_padding,
-                'right': word_start_x + word_width,
-                'bottom': underline_y + underline_padding,
-            }
-
-            line_index = self._get_line_index_from_char(text_hwnd, char_start)
-            if line_index is None and char_start is not None and char_length:
-                try:
-                    alt_index = max(0, char_start + char_length - 1)
-                except Exception:
-                    alt_index = char_start
-                if alt_index is not None:
-                    line_index = self._get_line_index_from_char(text_hwnd, alt_index)
-            if line_index is None:
-                try:
-                    if rect and height:
-                        line_index = int(round((underline_y - rect[1]) / max(1, height)))
-                    elif height:
-                        line_index = int(round(caret_y / max(1, height)))
-                except Exception:
-                    line_index = None
-            if line_index is not None and line_index < 0:
-                line_index = 0
+            underline_info = self._build_underline_info(
+                word,
+                suggestions,
+                caret_x,
+                caret_y,
+                word_width,
+                word_start_x,
+                hwnd=hwnd,
+                text_hwnd=text_hwnd,
+                window_rect=window_rect,
+                relative_start_x=relative_start_x,
+                relative_y=relative_y,
+                caret_height=caret_height,
+                char_start=char_start,
+                char_length=char_length,
+            )
 
             with self.underline_lock:
-                underline_index = self.underline_sequence
-                self.underline_sequence += 1
-                uid = f"{word}-{underline_index:04d}-{uuid.uuid4().hex[:6]}"
-
-                underline_info = {
-                    'id': uid,
-                    'word': word,
-                    'suggestions': suggestions,
-                    'hwnd': hwnd,
-                    'text_hwnd': text_hwnd,
-                    'absolute_position': (word_start_x, underline_y),
-                    'relative_start_x': rel_start,
-                    'relative_y': rel_y,
-                    'width': word_width,
-                    'bbox': bbox,
-                    'last_rect': rect,
-                    'added_at': time.time(),
-                    'caret_height': height,
-                    'char_start': char_start,
-                    'char_length': char_length if char_length is not None else len(word),
-                    'line_index': line_index,
-                }
-
-                self.misspelled_words[uid] = underline_info
+                uid = self._store_underline_info(underline_info)
                 total = len(self.misspelled_words)
 
             if draw_overlay:
+                word_x, underline_y = underline_info['absolute_position']
                 self.underline_overlay.add_underline(
                     word_id=uid,
-                    word_x=word_start_x,
+                    word_x=word_x,
                     word_y=underline_y,
                     word_width=word_width,
                     color=color,
@@ -1166,6 +1733,48 @@ class SmartKeyboardService:
         except Exception as exc:
             print(f"Failed to add persistent underline for '{word}': {exc}")
             return None
+
+    def add_persistent_underlines_batch(self, specs: List[dict]) -> List[Optional[str]]:
+        """Add many underlines with one lock acquisition and one overlay redraw.
+
+        Each spec holds the keyword arguments of add_persistent_underline.
+        Returns the new ids in spec order (None for entries that failed).
+        """
+        if not specs:
+            return []
+
+        prepared: List[Optional[dict]] = []
+        for spec in specs:
+            try:
+                prepared.append(self._build_underline_info(**spec))
+            except Exception as exc:
+                print(f"Failed to add persistent underline for '{spec.get('word')}': {exc}")
+                prepared.append(None)
+
+        with self.underline_lock:
+            uids = [self._store_underline_info(info) if info else None for info in prepared]
+            total = len(self.misspelled_words)
+
+        overlay_batch = []
+        for info, uid in zip(prepared, uids):
+            if not uid:
+                continue
+            word_x, underline_y = info['absolute_position']
+            overlay_batch.append({
+                'word_id': uid,
+                'word_x': word_x,
+                'word_y': underline_y,
+                'word_width': info['width'],
+                'color': self._resolve_underline_color(bool(info['suggestions'])),
+                'style': "wavy",
+                'hwnd': info['hwnd'],
+            })
+        if overlay_batch:
+            self._ensure_overlay_for(overlay_batch[0]['hwnd'])
+            self.underline_overlay.add_underlines(overlay_batch)
+
+        print(f"Added {len(overlay_batch)} persistent underlines - Total misspelled: {total}")
+        return uids
     
     def remove_persistent_underline(
         self,
@@ -1190,11 +1799,7 @@ class SmartKeyboardService:
                 if uid in self.misspelled_words:
                     candidates.append(uid)
             elif word:
-                candidates = [
-                    entry_id
-                    for entry_id, info in self.misspelled_words.items()
-                    if info.get('word') == word
-                ]
+                candidates = list(self._underline_ids_by_word.get(_canonical_word(word), ()))
 
             if word and len(candidates) > 1:
                 caret_index = char_index
@@ -1291,6 +1896,8 @@ class SmartKeyboardService:
                 info = self.misspelled_words.pop(candidate, None)
                 if not info:
                     continue
+                self._unindex_underline_word(candidate, info)
+                self._grid_remove(candidate)
                 removed_any = True
                 removed_count += 1
                 try:
@@ -1315,6 +1922,102 @@ class SmartKeyboardService:
 
         return removed_any
 
+    _GRID_SHIFT_X = 6  # 64px columns
+    _GRID_SHIFT_Y = 5  # 32px rows
+    _WINDOW_RECT_TTL = 0.1
+
+    def _underline_click_bounds(self, info: dict) -> Optional[Tuple[Optional[int], int, int, int, int]]:
+        """Return (hwnd, left, top, right, bottom) of an underline's click target.
+
+        Bounds are window-relative when the underline tracks a window (so they
+        stay valid while it moves) and absolute screen coordinates otherwise.
+        """
+        word_width = info.get('width', 0) or 0
+        if word_width <= 0:
+            return None
+        hwnd = info.get('hwnd')
+        rel_x = info.get('relative_start_x')
+        rel_y = info.get('relative_y')
+        if hwnd and rel_x is not None and rel_y is not None:
+            return hwnd, rel_x - 4, rel_y - 14, rel_x + word_width + 4, rel_y + 18
+        word_x, word_y = info.get('absolute_position', (0, 0))
+        bbox = info.get('bbox') or {}
+        return (
+            None,
+            bbox.get('left', word_x),
+            bbox.get('top', word_y - 14),
+            bbox.get('right', word_x + word_width),
+            bbox.get('bottom', word_y + 18),
+        )
+
+    def _grid_cell(self, x, y) -> Tuple[int, int]:
+        return int(x) >> self._GRID_SHIFT_X, int(y) >> self._GRID_SHIFT_Y
+
+    def _grid_insert(self, uid: str, info: dict):
+        """Index an underline in the click grid (caller holds underline_lock)."""
+        bounds = self._underline_click_bounds(info)
+        if not bounds:
+            return
+        hwnd, left, top, right, bottom = bounds
+        x0, y0 = self._grid_cell(left, top)
+        x1, y1 = self._grid_cell(right, bottom)
+        cells = [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+        grid = self._underline_grid.setdefault(hwnd, {})
+        for cell in cells:
+            grid.setdefault(cell, []).append(uid)
+        self._underline_cells[uid] = (hwnd, cells)
+
+    def _grid_remove(self, uid: str):
+        """Drop an underline from the click grid (caller holds underline_lock)."""
+        entry = self._underline_cells.pop(uid, None)
+        if not entry:
+            return
+        hwnd, cells = entry
+        grid = self._underline_grid.get(hwnd)
+        if grid is None:
+            return
+        for cell in cells:
+            bucket = grid.get(cell)
+            if not bucket:
+                continue
+            try:
+                bucket.remove(uid)
+            except ValueError:
+                pass
+            if not bucket:
+                del grid[cell]
+        if not grid:
+            del self._underline_grid[hwnd]
+
+    def _grid_clear(self):
+        """Reset the click grid and word index (caller holds underline_lock)."""
+        self._underline_grid.clear()
+        self._underline_cells.clear()
+        self._underline_ids_by_word.clear()
+
+    def _unindex_underline_word(self, uid: str, info: dict):
+        """Drop uid from the word index (caller holds underline_lock)."""
+        key = _canonical_word(info.get('word') or "")
+        ids = self._underline_ids_by_word.get(key)
+        if ids is None:
+            return
+        ids.pop(uid, None)
+        if not ids:
+            del self._underline_ids_by_word[key]
+
+    def _get_window_rect_cached(self, hwnd: int) -> Optional[Tuple[int, int, int, int]]:
+        """GetWindowRect with a short TTL so one click doesn't repeat the syscall."""
+        now = time.monotonic()
+        cached = self._window_rect_cache.get(hwnd)
+        if cached and now - cached[0] < self._WINDOW_RECT_TTL:
+            return cached[1]
+        try:
+            rect = win32gui.GetWindowRect(hwnd)
+        except Exception:
+            rect = None
+        self._window_rect_cache[hwnd] = (now, rect)
+        return rect
+
     def _shift_underlines_after(
         self,
         pivot_index: Optional[int],
@@ -1535,6 +2238,8 @@ class SmartKeyboardService:
                     'text_hwnd': text_hwnd,
                     'line_index': line_index,
                 })
+                self._grid_remove(uid)
+                self._grid_insert(uid, stored)
 
             if (
                 hwnd
@@ -1584,7 +2289,7 @@ class SmartKeyboardService:
             except Exception:
                 window_rect = None
 
-            spans = list(re.finditer(r'[^\s\n\r\t.,!?;:]+', word))
+            spans = list(_WORD_RE.finditer(word))
             if not spans:
                 return None
 
@@ -1620,6 +2325,7 @@ class SmartKeyboardService:
     
     def on_mouse_click(self, x, y, button, pressed):
         """Handle mouse clicks to detect clicks on underlined words"""
+        invalidate_caret_cache()  # A click can move the caret
         if button == Button.right:
             if pressed:
                 self._prepare_mouse_paste_candidate()
@@ -1643,64 +2349,76 @@ class SmartKeyboardService:
         # Small delay to let caret position update
         time.sleep(0.05)
         
-        with self.underline_lock:
-            underline_items = list(self.misspelled_words.items())
-
-        # Check if click is within the underlined word area (with some tolerance)
-        for uid, info in underline_items:
+        hit = self._find_underline_at(x, y)
+        if hit:
+            uid, info = hit
             word = info.get('word')
-            rect = None
-            word_x, word_y = info.get('absolute_position', (0, 0))
-            hwnd = info.get('hwnd')
-            rel_x = info.get('relative_start_x')
-            rel_y = info.get('relative_y')
-            if hwnd and rel_x is not None and rel_y is not None:
+
+            # User clicked on this underlined word!
+            suggestions = info['suggestions']
+            print(f"Clicked on underlined word '{word}' - showing suggestions")
+
+            if suggestions:
+                self.last_underline_id = uid
+                self.last_word = word
+                target_hwnd = info.get('hwnd')
+                current_hwnd = None
                 try:
-                    rect = win32gui.GetWindowRect(hwnd)
+                    current_hwnd = get_foreground_hwnd()
                 except Exception:
-                    rect = None
-                if rect:
-                    word_x = rect[0] + rel_x
-                    word_y = rect[1] + rel_y
-
-            word_width = info.get('width', 0)
-            if word_width <= 0:
-                continue
+                    current_hwnd = None
+                if target_hwnd and current_hwnd and not self._window_handles_match(target_hwnd, current_hwnd):
+                    print("Ignoring click: interface switched during click")
+                    return
+                self.popup.post_show(suggestions)
+            else:
+                print(f"No suggestions available for '{word}'")
 
-            bbox = info.get('bbox') or {}
-            left = bbox.get('left', word_x)
-            right = bbox.get('right', word_x + word_width)
-            top = bbox.get('top', word_y - 14)
-            bottom = bbox.get('bottom', word_y + 18)
+    def _find_underline_at(self, x: int, y: int) -> Optional[Tuple[str, dict]]:
+        """Return (uid, info) for the underline under a screen point using the click grid."""
+        with self.underline_lock:
+            hwnds = list(self._underline_grid.keys())
 
-            if rect and rel_x is not None and rel_y is not None:
-                left = word_x - 4
-                right = word_x + word_width + 4
-                top = word_y - 14
-                bottom = word_y + 18
+        origins = {}
+        for hwnd in hwnds:
+            origins[hwnd] = self._get_window_rect_cached(hwnd) if hwnd is not None else (0, 0, 0, 0)
 
-            if left <= x <= right and top <= y <= bottom:
-                
-                # User clicked on this underlined word!
-                suggestions = info['suggestions']
-                print(f"Clicked on underlined word '{word}' - showing suggestions")
-                
-                if suggestions:
-                    self.last_underline_id = uid
-                    self.last_word = word
-                    target_hwnd = info.get('hwnd')
-                    current_hwnd = None
-                    try:
-                        current_hwnd = win32gui.GetForegroundWindow()
-                    except Exception:
-                        current_hwnd = None
-                    if target_hwnd and current_hwnd and not self._window_handles_match(target_hwnd, current_hwnd):
-                        print("Ignoring click: interface switched during click")
-                        return
-                    self.popup.show(suggestions)
+        with self.underline_lock:
+            for hwnd in hwnds:
+                grid = self._underline_grid.get(hwnd)
+                if not grid:
+                    continue
+                rect = origins.get(hwnd)
+                if rect:
+                    uids = list(grid.get(self._grid_cell(x - rect[0], y - rect[1]), ()))
                 else:
-                    print(f"No suggestions available for '{word}'")
-                break
+                    # Window geometry unavailable: check every stored absolute box for this window.
+                    uids = list(dict.fromkeys(uid for bucket in grid.values() for uid in bucket))
+
+                for uid in uids:
+                    info = self.misspelled_words.get(uid)
+                    if not info:
+                        continue
+                    if rect:
+                        bounds = self._underline_click_bounds(info)
+                        if not bounds:
+                            continue
+                        _, left, top, right, bottom = bounds
+                        left += rect[0]
+                        right += rect[0]
+                        top += rect[1]
+                        bottom += rect[1]
+                    else:
+                        word_x, word_y = info.get('absolute_position', (0, 0))
+                        word_width = info.get('width', 0) or 0
+                        bbox = info.get('bbox') or {}
+                        left = bbox.get('left', word_x)
+                        right = bbox.get('right', word_x + word_width)
+                        top = bbox.get('top', word_y - 14)
+                        bottom = bbox.get('bottom', word_y + 18)
+                    if left <= x <= right and top <= y <= bottom:
+                        return uid, info
+        return None
 
     def _handle_word_click(self) -> None:
         """Show suggestions for the currently selected Word token."""
@@ -1719,7 +2437,7 @@ class SmartKeyboardService:
         if not word_text:
             return
 
-        normalized = re.sub(r"[.,!?;:]+$", "", word_text)
+        normalized = _TRAILING_PUNCT_RE.sub("", word_text)
         if not normalized:
             return
 
@@ -1736,33 +2454,18 @@ class SmartKeyboardService:
 
             self.last_underline_id = uid
             self.last_word = normalized
-            self.popup.show(suggestions)
+            self.popup.post_show(suggestions)
             return
 
-        suggestions, had_error = self.get_suggestions(normalized)
+        result = self.get_suggestions(normalized, timeout=self.suggestion_timeout)
+        if result is None:
+            return
+        suggestions, had_error = result
         if had_error and suggestions:
             self.last_underline_id = None
             self.last_word = normalized
-            self.popup.show(suggestions)
+            self.popup.post_show(suggestions)
     
-    def _move_caret(self, key, steps: int):
-        """Move caret left/right by a given number of steps."""
-        if steps <= 0:
-            return
-        for _ in range(steps):
-            try:
-                self.keyboard_controller.press(key)
-                self.keyboard_controller.release(key)
-            except Exception:
-                break
-            time.sleep(self.caret_step_delay)
-
-    def move_caret_left(self, steps: int):
-        self._move_caret(Key.left, steps)
-
-    def move_caret_right(self, steps: int):
-        self._move_caret(Key.right, steps)
-
     def _compute_typed_word_overlay(self, word: str, geometry: dict) -> Optional[dict]:
         """Return precise overlay geometry for a typed word using live layout data."""
         if not word:
@@ -1792,7 +2495,7 @@ class SmartKeyboardService:
             word_start = candidate
             word_end = word_start + len(word)
 
-        spans = list(re.finditer(r'[^\s\n\r\t.,!?;:]+', word))
+        spans = list(_WORD_RE.finditer(word))
         if not spans:
             return None
 
@@ -1821,20 +2524,29 @@ class SmartKeyboardService:
             'char_length': len(word),
         }
 
-    def show_no_suggestion_marker(self, word: str, has_suggestions: bool = False, suggestions: list = None):
+    def show_no_suggestion_marker(
+        self,
+        word: str,
+        has_suggestions: bool = False,
+        suggestions: list = None,
+        geometry: Optional[dict] = None,
+    ):
         """Show persistent underline directly beneath the misspelled Kannada word.
         
         Args:
             word: The word to underline
             has_suggestions: True if suggestions available (orange), False for severe errors (red)
             suggestions: List of suggestions for this word
+            geometry: Caret snapshot taken when the word was committed (live caret if None)
         """
         if not word or not self.enabled:
             return
         is_word_app = self.current_interface == "Microsoft Word"
         underline_id: Optional[str] = None
         try:
-            geometry = self._capture_live_geometry()
+            snapshot = geometry is not None
+            if not snapshot:
+                geometry = self._capture_live_geometry()
             overlay_info = self._compute_typed_word_overlay(word, geometry) if geometry else None
 
             caret_x = None
@@ -1858,9 +2570,11 @@ class SmartKeyboardService:
                 char_start = overlay_info.get('char_start')
                 char_length = overlay_info.get('char_length') or char_length
 
+            if (not hwnd or not win32gui.IsWindow(hwnd)) and geometry:
+                hwnd = geometry.get('hwnd')
             if not hwnd or not win32gui.IsWindow(hwnd):
                 try:
-                    hwnd = windll.user32.GetForegroundWindow()
+                    hwnd = get_foreground_hwnd()
                 except Exception:
                     hwnd = None
 
@@ -1872,7 +2586,10 @@ class SmartKeyboardService:
                 if selection_start is not None:
                     char_start = max(0, selection_start - len(word))
 
-            caret_rect_raw = self.caret_tracker.get_caret_rect(hwnd) if self.caret_tracker else None
+            if snapshot and 'tracker_caret_rect' in geometry:
+                caret_rect_raw = geometry['tracker_caret_rect']
+            else:
+                caret_rect_raw = self.caret_tracker.get_caret_rect(hwnd) if self.caret_tracker else None
             caret_rect = self.caret_tracker.get_scaled_rect(caret_rect_raw, self.dpi.scale) if caret_rect_raw else None
             caret_height = None
 
@@ -1892,7 +2609,10 @@ class SmartKeyboardService:
                     word_width = measure_text_width(word, hwnd)
 
             if caret_x is None or caret_y is None:
-                caret_x, caret_y = get_caret_position()
+                if snapshot and geometry.get('absolute_x') is not None and geometry.get('absolute_y') is not None:
+                    caret_x, caret_y = geometry['absolute_x'], geometry['absolute_y']
+                else:
+                    caret_x, caret_y = get_caret_position()
                 if caret_height is None:
                     caret_height = self._get_caret_height(hwnd)
 
@@ -2236,22 +2956,33 @@ class SmartKeyboardService:
     
     def get_clipboard_text(self):
         """Get text from clipboard safely"""
+        try:
+            # The sequence number changes on every clipboard update; reuse the last
+            # read while it is unchanged instead of opening the clipboard again
+            seq = win32clipboard.GetClipboardSequenceNumber()
+        except Exception:
+            seq = 0
+        if seq and seq == self._clipboard_seq:
+            return self._clipboard_text
+        data = None
         try:
             win32clipboard.OpenClipboard()
             try:
                 if win32clipboard.IsClipboardFormatAvailable(win32clipboard.CF_UNICODETEXT):
                     data = win32clipboard.GetClipboardData(win32clipboard.CF_UNICODETEXT)
-                    return data
             finally:
                 win32clipboard.CloseClipboard()
         except Exception:
-            pass
-        return None
+            # Leave the cache alone so the next call retries the read
+            return None
+        self._clipboard_seq = seq
+        self._clipboard_text = data
+        return data
     
     def _get_focus_handles(self) -> Tuple[Optional[int], Optional[int]]:
         """Return (foreground_hwnd, focus_hwnd) using GUI thread info"""
         try:
-            foreground = windll.user32.GetForegroundWindow()
+            foreground = get_foreground_hwnd()
             if not foreground:
                 return None, None
             thread_id = windll.user32.GetWindowThreadProcessId(foreground, 0)
@@ -2268,11 +2999,13 @@ class SmartKeyboardService:
         if not hwnd:
             return None
         try:
-            length = win32gui.SendMessage(hwnd, win32con.WM_GETTEXTLENGTH, 0, 0)
-            if length <= 0 or length > 500000:
+            length = send_message_timeout(hwnd, win32con.WM_GETTEXTLENGTH)
+            if not length or length > 500000:
                 return None
             buffer = create_unicode_buffer(length + 1)
-            win32gui.SendMessage(hwnd, win32con.WM_GETTEXT, length + 1, buffer)
+            copied = send_message_timeout(hwnd, win32con.WM_GETTEXT, length + 1, ctypes.addressof(buffer))
+            if copied is None:
+                return None
             return buffer.value
         except Exception:
             return None
@@ -2282,8 +3015,7 @@ class SmartKeyboardService:
         if not text:
             return []
         # Split by delimiters while preserving Kannada words
-        words = re.findall(r'[^\s\n\r\t.,!?;:]+', text)
-        return [w for w in words if any(self.is_kannada_char(c) for c in w)]
+        return _KANNADA_WORD_RE.findall(text)
     
     def get_document_text(self) -> str:
         """Get all text from the active document without injecting 'Ctrl+A/C' keystrokes."""
@@ -2307,78 +3039,130 @@ class SmartKeyboardService:
             print(f"Error getting document text: {exc}")
             return ""
     
-    def check_all_words_from_start_to_end(self):
-        """Check all words in document from start to end and update dictionary"""
+    def check_all_words_from_start_to_end(
+        self, known_results: Optional[Dict[str, Tuple[List[str], bool]]] = None
+    ):
+        """Check all words in document from start to end and update dictionary.
+
+        known_results maps words already checked by the caller (the paste pass)
+        to their (suggestions, had_error) so they are not looked up again.
+        """
         try:
             # Get full document text
             full_text = self.get_document_text()
             if not full_text:
                 return
             
+            if full_text == self.document_text_cache and self.document_words:
+                return
+
             # Update cache
             self.document_text_cache = full_text
             
             # Extract all words with their positions
-            word_matches = list(re.finditer(r'[^\s\n\r\t.,!?;:]+', full_text))
             kannada_words = []
             
-            for match in word_matches:
-                word = match.group(0)
-                position = match.start()
-                # Only process Kannada words
-                if any(self.is_kannada_char(c) for c in word) and len(word) >= 2:
-                    kannada_words.append((word, position))
+            for match in _KANNADA_WORD_RE.finditer(full_text):
+                position, end = match.span()
+                # Only Kannada words are matched; skip single characters
+                if end - position >= 2:
+                    kannada_words.append((full_text[position:end], position))
             
             print(f"Checking {len(kannada_words)} words from start to end...")
             
-            # Clear old document_words and rebuild
+            # Diff against the previous word list so unchanged words are not re-checked.
+            # Records are compared by the text they now stand for, so a replacement that
+            # was undone in the editor no longer matches and is checked again.
+            # Spell checks run without document_lock; live records are never mutated here.
             with self.document_lock:
-                self.document_words.clear()
-                self.word_index_counter = 0
-                
-                for word, position in kannada_words:
-                    word_index = self.word_index_counter
-                    self.word_index_counter += 1
-                    
-                    # Check spelling
-                    suggestions, had_error = self.get_suggestions(word)
-                    
-                    # Store in dictionary
-                    self.document_words[word_index] = {
-                        'word': word,
-                        'corrected_word': word,  # Initially same as word
-                        'suggestions': suggestions,
-                        'position': position,
-                        'has_error': had_error,
-                        'checked': True
-                    }
-                    
-                    # Add underline if error
-                    if had_error:
-                        # Note: We'll need to get caret position for this word
-                        # For now, we'll add it to misspelled_words for tracking
-                        # The underline will be added when we process each word individually
-                        pass
+                old_records = list(self.document_words)
+            matcher = SequenceMatcher(
+                None,
+                [rec.corrected_word for rec in old_records],
+                [word for word, _ in kannada_words],
+                autojunk=False,
+            )
+            segments: List[Tuple[Optional[Tuple[int, int, int]], List[WordRec]]] = []
+            rechecked = 0
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag == 'equal':
+                    segments.append(((i1, i2, j1), []))
+                elif tag in ('replace', 'insert'):
+                    fresh = []
+                    for word, position in kannada_words[j1:j2]:
+                        known = known_results.get(word) if known_results else None
+                        if known is not None:
+                            suggestions, had_error = list(known[0]), known[1]
+                        else:
+                            suggestions, had_error = self.get_suggestions(word, known_kannada=True)
+                            rechecked += 1
+                        fresh.append(WordRec(word, suggestions, position, had_error))
+                    segments.append((None, fresh))
+            with self.document_lock:
+                # Unchanged words are copied at their new positions under the lock, so
+                # readers see either the old list or the new one, and any concurrent
+                # update_document_word correction is carried over.
+                updated: List[WordRec] = []
+                for equal_run, fresh in segments:
+                    if equal_run is None:
+                        updated.extend(fresh)
+                        continue
+                    i1, i2, j1 = equal_run
+                    for offset, rec in enumerate(old_records[i1:i2]):
+                        updated.append(rec.relocated(kannada_words[j1 + offset][1]))
+                self.document_words = updated
+                self._reindex_document_words()
             
-            print(f"Document dictionary updated: {len(self.document_words)} words tracked")
-            print(f"   Errors found: {sum(1 for w in self.document_words.values() if w['has_error'])}")
+            print(f"Document dictionary updated: {len(self.document_words)} words tracked ({rechecked} re-checked)")
+            print(f"   Errors found: {sum(1 for w in self.document_words if w.has_error)}")
             
         except Exception as exc:
             print(f"Error checking all words: {exc}")
             import traceback
             traceback.print_exc()
     
-    def update_document_word(self, old_word: str, new_word: str):
-        """Update a word in the document dictionary when replaced"""
+    def _reindex_document_words(self):
+        """Rebuild the current-text -> indices map (caller must hold document_lock)."""
+        index: Dict[str, List[int]] = {}
+        for idx, rec in enumerate(self.document_words):
+            index.setdefault(rec.corrected_word, []).append(idx)
+        self._word_to_indices = index
+
+    def update_document_word(self, old_word: str, new_word: str, position: Optional[int] = None):
+        """Update a word in the document dictionary when replaced.
+
+        Later entries are shifted by the length change in place, so a local
+        replacement never needs a full-document rescan. Only one occurrence is
+        updated: other copies of the old word are still present in the text.
+        """
+        # Check the replacement once, outside the lock (usually an LRU hit)
+        suggestions, had_error = self.get_suggestions(new_word)
         with self.document_lock:
-            for word_index, word_data in self.document_words.items():
-                if word_data['word'] == old_word or word_data['corrected_word'] == old_word:
-                    word_data['corrected_word'] = new_word
-                    word_data['has_error'] = False
-                    # Re-check the new word
-                    suggestions, had_error = self.get_suggestions(new_word)
-                    word_data['suggestions'] = suggestions
-                    word_data['has_error'] = had_error
+            candidates = self._word_to_indices.get(old_word, ())
+            if position is not None:
+                # Prefer the occurrence at the replaced position when known
+                candidates = sorted(candidates, key=lambda i: self.document_words[i].position != position)
+            for word_index in candidates:
+                word_data = self.document_words[word_index]
+                # Only a record whose current text is still old_word can be the replaced one
+                if word_data.corrected_word == old_word:
+                    delta = len(new_word) - len(old_word)
+                    start = word_data.position
+                    cache = self.document_text_cache
+                    if cache[start:start + len(old_word)] == old_word:
+                        self.document_text_cache = cache[:start] + new_word + cache[start + len(old_word):]
+                    if delta:
+                        for rec in self.document_words[word_index + 1:]:
+                            rec.position += delta
+                    word_data.corrected_word = new_word
+                    old_indices = self._word_to_indices.get(old_word)
+                    if old_indices and word_index in old_indices:
+                        old_indices.remove(word_index)
+                    indices = self._word_to_indices.setdefault(new_word, [])
+                    if word_index not in indices:
+                        indices.append(word_index)
+                    word_data.suggestions = suggestions
+                    word_data.has_error = had_error
                     print(f"Updated document word {word_index}: '{old_word}' -> '{new_word}'")
                     break
 
@@ -2391,7 +3175,7 @@ class SmartKeyboardService:
             anchor_y = None
 
         try:
-            hwnd = windll.user32.GetForegroundWindow()
+            hwnd = get_foreground_hwnd()
         except Exception:
             hwnd = None
 
@@ -2406,16 +3190,8 @@ class SmartKeyboardService:
                     text_hwnd = gui_info.hwndCaret or gui_info.hwndFocus or hwnd
                     caret_rect = gui_info.rcCaret
                     if text_hwnd:
-                        start_index = wintypes.DWORD()
-                        end_index = wintypes.DWORD()
                         try:
-                            windll.user32.SendMessageW(
-                                text_hwnd,
-                                win32con.EM_GETSEL,
-                                byref(start_index),
-                                byref(end_index)
-                            )
-                            selection_start = start_index.value
+                            selection_start, _ = get_edit_selection(text_hwnd)
                         except Exception:
                             selection_start = None
             except Exception:
@@ -2447,14 +3223,18 @@ class SmartKeyboardService:
             'line_height': line_height,
             'caret_rect': caret_rect,
             'selection_start': selection_start,
-            'timestamp': time.time(),
+            'timestamp': time.monotonic(),
         }
 
         return snapshot
 
-    def capture_paste_anchor(self):
-        """Snapshot caret and window geometry just before a paste."""
-        snapshot = self._capture_live_geometry()
+    def capture_paste_anchor(self, snapshot: Optional[dict] = None):
+        """Snapshot caret and window geometry just before a paste.
+
+        ``snapshot`` is geometry already captured in the hook; otherwise it is read now.
+        """
+        if snapshot is None:
+            snapshot = self._capture_live_geometry()
         if snapshot:
             self.last_paste_anchor = snapshot
 
@@ -2473,7 +3253,7 @@ class SmartKeyboardService:
             caret_index = self._get_caret_char_index()
 
             self._menu_paste_candidate = {
-                'timestamp': time.time(),
+                'timestamp': time.monotonic(),
                 'before_text': before_text,
                 'caret_index': caret_index,
                 'geometry': geometry,
@@ -2489,7 +3269,7 @@ class SmartKeyboardService:
         if not candidate:
             return
 
-        if time.time() - candidate.get('timestamp', 0) > 5.0:
+        if time.monotonic() - candidate.get('timestamp', 0) > 5.0:
             self._menu_paste_candidate = None
             return
 
@@ -2510,7 +3290,7 @@ class SmartKeyboardService:
         if not self.enabled or self.replacing:
             return
 
-        if time.time() - candidate.get('timestamp', 0) > 5.0:
+        if time.monotonic() - candidate.get('timestamp', 0) > 5.0:
             return
 
         before_text = candidate.get('before_text') or ""
@@ -2544,8 +3324,7 @@ class SmartKeyboardService:
         else:
             text_to_process = inserted
 
-        words = self.extract_words_from_text(text_to_process)
-        if not words:
+        if _KANNADA_WORD_RE.search(text_to_process) is None:
             return
 
         geometry = candidate.get('geometry')
@@ -2573,20 +3352,11 @@ class SmartKeyboardService:
 
         len_before = len(before)
         len_after = len(after)
-        prefix_len = 0
-        max_prefix = min(len_before, len_after)
-        while prefix_len < max_prefix and before[prefix_len] == after[prefix_len]:
-            prefix_len += 1
+        prefix_len = _common_prefix_len(before, after, min(len_before, len_after))
 
-        suffix_len = 0
         remaining_before = len_before - prefix_len
         remaining_after = len_after - prefix_len
-        max_suffix = min(remaining_before, remaining_after)
-        while (
-            suffix_len < max_suffix
-            and before[len_before - 1 - suffix_len] == after[len_after - 1 - suffix_len]
-        ):
-            suffix_len += 1
+        suffix_len = _common_suffix_len(before, after, min(remaining_before, remaining_after))
 
         start_after = prefix_len
         end_after = len_after - suffix_len if suffix_len <= len_after - prefix_len else len_after
@@ -2635,11 +3405,13 @@ class SmartKeyboardService:
 
     def _start_paste_cooldown(self, duration: float = 0.3):
         """Pause keystroke-based processing for a short, Grammarly-style cooldown."""
-        self.paste_cooldown_until = max(self.paste_cooldown_until, time.time() + max(0.0, duration))
+        self.paste_cooldown_until = max(self.paste_cooldown_until, time.monotonic() + max(0.0, duration))
 
-    def _in_paste_cooldown(self) -> bool:
+    def _in_paste_cooldown(self, now: Optional[float] = None) -> bool:
         """Return True while paste processing is still settling."""
-        return time.time() < self.paste_cooldown_until
+        if now is None:
+            now = time.monotonic()
+        return now < self.paste_cooldown_until
 
     def _resolve_paste_anchor_geometry(self) -> Optional[dict]:
         """Build a geometry snapshot for paste underline placement."""
@@ -2647,7 +3419,7 @@ class SmartKeyboardService:
         hwnd = anchor.get('hwnd')
         if not hwnd:
             try:
-                hwnd = windll.user32.GetForegroundWindow()
+                hwnd = get_foreground_hwnd()
             except Exception:
                 hwnd = None
 
@@ -2696,6 +3468,17 @@ class SmartKeyboardService:
             'caret_rect': anchor.get('caret_rect')
         }
 
+    def _measure_text_width_hdc(self, hdc: int, word: str, size: Optional[SIZE] = None) -> int:
+        """Measure word on an already prepared DC (font selected) without touching other DCs."""
+        try:
+            extent = _text_extent(hdc, word, size)
+            if extent:
+                return max(self.layout_min_char_px, extent)
+        except Exception:
+            pass
+        # Same rough estimate measure_text_width uses when GDI is unavailable
+        return len(word) * 12
+
     def _build_notepad_layout(
         self,
         full_text: str,
@@ -2703,15 +3486,28 @@ class SmartKeyboardService:
         geometry: dict
     ) -> Dict[int, dict]:
         """Return per-word geometry using the edit control's own layout data."""
-        if not full_text or not spans or not geometry:
+        if not spans:
             return {}
+        return {
+            span_idx: layout_info
+            for span_idx, _, _, layout_info in self._iter_notepad_layout(full_text, spans, geometry)
+        }
+
+    def _iter_notepad_layout(
+        self,
+        full_text: str,
+        matches: Iterable[re.Match],
+        geometry: dict
+    ) -> Iterator[Tuple[int, re.Match, str, dict]]:
+        """Yield (span_idx, match, word, layout_info) per word, in one pass over the matches."""
+        if not full_text or not geometry:
+            return
 
         text_hwnd = geometry.get('text_hwnd') or geometry.get('hwnd')
         selection_start = geometry.get('selection_start')
         if not text_hwnd or selection_start is None:
-            return {}
+            return
 
-        layout: Dict[int, dict] = {}
         origin_x = 0
         origin_y = 0
         ascent = None
@@ -2729,7 +3525,7 @@ class SmartKeyboardService:
         try:
             hdc = win32gui.GetDC(text_hwnd)
             if not hdc:
-                return {}
+                return
 
             hfont = win32gui.SendMessage(text_hwnd, win32con.WM_GETFONT, 0, 0)
             if hfont:
@@ -2748,40 +3544,27 @@ class SmartKeyboardService:
             except Exception:
                 ascent = None
 
-            for span_idx, match in enumerate(spans):
+            _sync_measurement_caches()
+            size = SIZE()  # Reused out-parameter for GetTextExtentPoint32W
+            for span_idx, match in enumerate(matches):
                 word = match.group(0)
                 if not word:
                     continue
 
                 char_start = selection_start + match.start()
-                char_end = char_start + len(word)
 
+                # Only the start needs a cross-process round-trip; the width comes
+                # from the control's own font already selected into hdc.
                 start_pos = windll.user32.SendMessageW(text_hwnd, win32con.EM_POSFROMCHAR, char_start, 0)
                 if start_pos in (-1, 0xFFFFFFFF):
                     continue
                 start_x = c_short(start_pos & 0xFFFF).value
                 start_y = c_short((start_pos >> 16) & 0xFFFF).value
 
-                end_pos = windll.user32.SendMessageW(text_hwnd, win32con.EM_POSFROMCHAR, char_end, 0)
-                if end_pos in (-1, 0xFFFFFFFF):
-                    end_x = start_x + measure_text_width(word, text_hwnd)
-                    end_y = start_y
-                else:
-                    end_x = c_short(end_pos & 0xFFFF).value
-                    end_y = c_short((end_pos >> 16) & 0xFFFF).value
-
                 screen_start_x = origin_x + start_x
                 screen_start_y = origin_y + start_y
-                screen_end_x = origin_x + end_x
-                screen_end_y = origin_y + end_y
-
-                if screen_end_y != screen_start_y:
-                    word_width = measure_text_width(word, text_hwnd)
-                else:
-                    word_width = max(self.layout_min_char_px, screen_end_x - screen_start_x)
 
-                if word_width <= 0:
-                    word_width = measure_text_width(word, text_hwnd)
+                word_width = self._measure_text_width_hdc(hdc, word, size)
 
                 if ascent is not None:
                     baseline_offset = ascent
@@ -2824,7 +3607,7 @@ class SmartKeyboardService:
 
                 baseline_y = screen_start_y + baseline_offset + line_offset
 
-                layout[span_idx] = {
+                yield span_idx, match, word, {
                     'start_x': screen_start_x,
                     'baseline_y': baseline_y,
                     'width': word_width,
@@ -2842,8 +3625,6 @@ class SmartKeyboardService:
                 except Exception:
                     pass
 
-        return layout
-
     def process_pasted_text_for_underlines(self, full_text: str):
         """One-shot paste pass that measures every word from the window edge.
 
@@ -2863,8 +3644,7 @@ class SmartKeyboardService:
         # Keep extending the cooldown while this batch runs to avoid keystroke overlap.
         self._start_paste_cooldown(0.8)
 
-        spans = list(re.finditer(r'[^\s\n\r\t.,!?;:]+', full_text))
-        if not spans:
+        if _WORD_RE.search(full_text) is None:
             return
 
         geometry_snapshot = self._resolve_paste_anchor_geometry()
@@ -2879,13 +3659,25 @@ class SmartKeyboardService:
                     self._clear_all_underlines_notepad_async()
                     return
 
+                # Words are checked in document order on this thread; the edit-distance
+                # work holds the GIL, and repeats are answered from the suggestion caches.
+                # Results are kept so the document index refresh below reuses them.
+                results: Dict[str, Tuple[List[str], bool]] = {}
+
+                def check(word: str) -> Tuple[List[str], bool]:
+                    result = results.get(word)
+                    if result is None:
+                        result = results[word] = self.get_suggestions(word, known_kannada=True)
+                    return result
+
                 if self.current_interface == "Microsoft Word":
-                    for match in spans:
-                        word = match.group(0)
-                        if len(word) < 2 or not any(self.is_kannada_char(c) for c in word):
+                    for match in _KANNADA_WORD_RE.finditer(full_text):
+                        start, end = match.span()
+                        if end - start < 2:
                             continue
+                        word = full_text[start:end]
 
-                        suggestions, had_error = self.get_suggestions(word)
+                        suggestions, had_error = check(word)
                         if not had_error:
                             continue
 
@@ -2894,6 +3686,7 @@ class SmartKeyboardService:
                             has_suggestions=bool(suggestions),
                             suggestions=suggestions,
                         )
+                    self.check_all_words_from_start_to_end(known_results=results)
                     return
 
                 geometry = geometry_snapshot or self._resolve_paste_anchor_geometry()
@@ -2906,35 +3699,28 @@ class SmartKeyboardService:
                 line_height = geometry['line_height']
                 text_hwnd = geometry.get('text_hwnd')
                 selection_start = geometry.get('selection_start')
-                layout_map = self._build_notepad_layout(full_text, spans, geometry)
-                if not layout_map:
-                    print("Unable to rebuild Notepad layout; skipping paste underlines.")
-                    return
                 caret_height = self._get_caret_height(target_hwnd)
                 if caret_height is None:
                     caret_height = line_height
                 underline_offset = self._compute_underline_offset(caret_height)
 
-                for idx, match in enumerate(spans):
+                laid_out = False
+                underline_specs: List[dict] = []
+                layout_iter = self._iter_notepad_layout(full_text, _WORD_RE.finditer(full_text), geometry)
+                for _, match, word, layout_info in layout_iter:
+                    laid_out = True
                     if self.current_interface == "Notepad" and self._is_notepad_document_empty():
                         print("Notepad document cleared mid-paste; stopping underline placement loop.")
                         self._clear_all_underlines_notepad_async()
                         return
 
-                    layout_info = layout_map.get(idx)
-                    if not layout_info:
-                        continue
                     word_width = layout_info['width']
                     caret_y = layout_info['baseline_y']
                     word_start_x = layout_info['start_x']
-                    word = match.group(0)
-                    word_len = len(word)
-                    is_kannada_word = word_len >= 2 and any(self.is_kannada_char(c) for c in word)
-
-                    if not is_kannada_word:
+                    if len(word) < 2 or not _has_kannada(word):
                         continue
 
-                    suggestions, had_error = self.get_suggestions(word)
+                    suggestions, had_error = check(word)
                     if not had_error:
                         continue
 
@@ -2950,27 +3736,35 @@ class SmartKeyboardService:
                     if selection_start is not None:
                         char_start = selection_start + match.start()
 
-                    underline_id = self.add_persistent_underline(
-                        word=word,
-                        suggestions=suggestions,
-                        caret_x=caret_x,
-                        caret_y=caret_y,
-                        word_width=word_width,
-                        word_start_x=word_start_x,
-                        hwnd=target_hwnd,
-                        text_hwnd=text_hwnd,
-                        window_rect=window_rect,
-                        relative_start_x=relative_start,
-                        relative_y=relative_y,
-                        caret_height=caret_height,
-                        char_start=char_start,
-                        char_length=len(word),
-                    )
+                    underline_specs.append({
+                        'word': word,
+                        'suggestions': suggestions,
+                        'caret_x': caret_x,
+                        'caret_y': caret_y,
+                        'word_width': word_width,
+                        'word_start_x': word_start_x,
+                        'hwnd': target_hwnd,
+                        'text_hwnd': text_hwnd,
+                        'window_rect': window_rect,
+                        'relative_start_x': relative_start,
+                        'relative_y': relative_y,
+                        'caret_height': caret_height,
+                        'char_start': char_start,
+                        'char_length': len(word),
+                    })
+
+                if not laid_out:
+                    print("Unable to rebuild Notepad layout; skipping paste underlines.")
+                    return
+
+                # One lock acquisition and one overlay redraw for the whole paste
+                self.add_persistent_underlines_batch(underline_specs)
+                # A paste can change arbitrary spans; refresh the document index from
+                # the results above rather than spell-checking the words a second time
+                self.check_all_words_from_start_to_end(known_results=results)
 
             except Exception as exc:
-                print(f"Error processing pasted words for underlines: {exc}")
-                import traceback
-                traceback.print_exc()
+                self._log_paste_exception("processing pasted words for underlines", exc)
             finally:
                 self.replacing = False
                 self.last_paste_anchor = None
@@ -2983,7 +3777,8 @@ class SmartKeyboardService:
         """Entry point invoked after Ctrl+V settles; runs the one-shot paste pass."""
         try:
             clipboard_text = self.get_clipboard_text()
-            print(f"Clipboard content: {repr(clipboard_text)}")
+            if self.debug_keys:
+                print(f"Clipboard content: {repr(clipboard_text)}")
             
             if not clipboard_text:
                 print("No clipboard text found")
@@ -2992,39 +3787,117 @@ class SmartKeyboardService:
             # Always update clipboard content
             self.last_clipboard_content = clipboard_text
             
-            # Extract Kannada words from pasted text
-            words = self.extract_words_from_text(clipboard_text)
-            print(f"Extracted Kannada words: {words}")
+            # Only need to know whether any Kannada word exists; the paste pass tokenizes itself
+            has_words = _KANNADA_WORD_RE.search(clipboard_text) is not None
             
-            if words and self.enabled and not self.replacing:
+            if has_words and self.enabled and not self.replacing:
                 self.process_pasted_text_for_underlines(clipboard_text)
             else:
                 print(f"No Kannada words found or service disabled")
         except Exception as e:
-            print(f"Error checking pasted text: {e}")
-            import traceback
-            traceback.print_exc()
+            self._log_paste_exception("checking pasted text", e)
     
-    def get_suggestions(self, word) -> Tuple[List[str], bool]:
-        """Return suggestion list for a word along with an error flag"""
+    def get_suggestions(
+        self,
+        word,
+        *,
+        known_kannada: Optional[bool] = None,
+        timeout: Optional[float] = None,
+    ) -> Optional[Tuple[List[str], bool]]:
+        """Return suggestion list for a word along with an error flag.
+
+        Pass known_kannada=True when the caller already filtered for Kannada
+        text, to skip re-scanning the word. With a timeout the lookup runs on
+        the suggestion pool and returns None if it overruns (or the word overran
+        recently), meaning "unknown" rather than "correct". Without a timeout
+        the result is never None.
+        """
         if not word or len(word) < 2:
             return [], False
-        if not any(self.is_kannada_char(c) for c in word):
+        if not known_kannada and not _has_kannada(word):
+            return [], False
+        word = _canonical_word(word)
+        if word in self._known_correct:
             return [], False
-        was_kannada = is_kannada_text(word)
+        # Dictionary words need no tokenizing or edit-distance work; the vocabulary is static
+        # per session. The word is known to contain Kannada here, so the checker skips its rescan.
+        if self.spell_checker.is_known_word(word, kannada=True):
+            self._known_correct.add(word)
+            return [], False
+        with self._suggestion_cache_lock:
+            cached = self._suggestion_cache.get(word)
+            if cached is not None:
+                self._suggestion_cache.move_to_end(word)
+                return list(cached[0]), cached[1]
+            slow_since = self._slow_words.get(word)
+        if timeout is None:
+            result = self._lookup_suggestions(word)
+        else:
+            if slow_since is not None and time.monotonic() - slow_since < self.slow_word_retry:
+                return None
+            future = self._suggestion_pool.submit(self._lookup_suggestions, word)
+            try:
+                result = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                print(f"Spell check for '{word}' exceeded {timeout:.1f}s; skipping for now")
+                with self._suggestion_cache_lock:
+                    self._slow_words[word] = time.monotonic()
+                return None
+        return list(result[0]), result[1]
+
+    def _lookup_suggestions(self, word: str) -> Tuple[List[str], bool]:
+        """Run check_text on a canonical word and record the outcome in the caches."""
         try:
             errors = self.spell_checker.check_text(word)
             if errors:
                 error = errors[0]
-                suggestions = error.get('suggestions', [])
-                if was_kannada:
-                    from kannada_wx_converter import wx_to_kannada
-                    suggestions = [wx_to_kannada(s) for s in suggestions]
-                return suggestions[:5], True
+                # The word contains Kannada here, so map WX suggestions back to script
+                suggestions = [wx_to_kannada(s) for s in error.get('suggestions', [])]
+                result = (suggestions[:5], True)
+            else:
+                self._known_correct.add(word)
+                result = ([], False)
         except Exception:
             return [], False
-        return [], False
+        with self._suggestion_cache_lock:
+            self._slow_words.pop(word, None)
+            if result[1]:
+                self._suggestion_cache[word] = result
+                if len(self._suggestion_cache) > self._suggestion_cache_size:
+                    self._suggestion_cache.popitem(last=False)
+        return result
+
+    def _warm_spell_checker(self):
+        """Run one throwaway lookup so the first committed word doesn't pay cold-start costs."""
+        try:
+            # Goes through the same path as a typed word: NFC keying, check_text, WX -> script
+            self.get_suggestions('ಕನ್ನಡಾ', known_kannada=True)
+        except Exception as exc:
+            print(f"Spell checker warm-up failed: {exc}")
+
+    def clear_suggestion_cache(self):
+        """Forget memoized suggestions (call after the dictionary changes)."""
+        with self._suggestion_cache_lock:
+            self._suggestion_cache.clear()
+            self._known_correct.clear()
+            self._slow_words.clear()
     
+    def request_replacement(self, chosen_word):
+        """Queue a replacement on the key worker so the Tk thread never blocks on injection."""
+        self._key_q.put_nowait(('replace', chosen_word, None))
+
+    def _wait_for_injected_keys(self):
+        """Return once the hook has been quiet for injected_settle_gap (capped at injected_settle_max)."""
+        deadline = time.monotonic() + self.injected_settle_max
+        activity = self._injected_activity
+        while True:
+            activity.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not activity.wait(min(self.injected_settle_gap, remaining)):
+                return
+
     def replace_word(self, chosen_word):
         """Replace the misspelled word with chosen suggestion"""
         print(f"Replacing with: '{chosen_word}'")
@@ -3046,34 +3919,32 @@ class SmartKeyboardService:
         self.select_all_active = False
         self.ctrl_held = False
         try:
-            self.last_replaced_word = chosen_word
-            self.last_replacement_time = time.time()
+            self.last_replaced_word = _canonical_word(chosen_word)
+            self.last_replacement_time = time.monotonic()
             self.popup.hide()
             time.sleep(0.05)
 
             delimiter = self.last_delimiter_char or ' '
+            controller = self.keyboard_controller
 
             # Remove the delimiter (space) that triggered the suggestion
-            self.keyboard_controller.press(Key.backspace)
-            self.keyboard_controller.release(Key.backspace)
+            controller.press(_BACKSPACE)
+            controller.release(_BACKSPACE)
             time.sleep(0.01)
 
             # Select the previous word using Ctrl+Shift+Left
-            self.keyboard_controller.press(Key.ctrl)
-            self.keyboard_controller.press(Key.shift)
-            self.keyboard_controller.press(Key.left)
-            self.keyboard_controller.release(Key.left)
-            self.keyboard_controller.release(Key.shift)
-            self.keyboard_controller.release(Key.ctrl)
+            with controller.pressed(_CTRL, _SHIFT):
+                controller.press(_LEFT)
+                controller.release(_LEFT)
             time.sleep(0.01)
 
             # Delete the selected word
-            self.keyboard_controller.press(Key.delete)
-            self.keyboard_controller.release(Key.delete)
+            controller.press(_DELETE)
+            controller.release(_DELETE)
             time.sleep(0.02)
 
             # Type the chosen word
-            self.keyboard_controller.type(chosen_word)
+            controller.type(chosen_word)
             time.sleep(0.01)
 
             # Re-type the original delimiter so spacing stays consistent
@@ -3084,8 +3955,8 @@ class SmartKeyboardService:
             if self.current_interface == "Microsoft Word":
                 self._clear_word_underline_for_replacement(chosen_word, delimiter)
 
-            # Wait longer before resetting flag to ensure space is fully processed
-            time.sleep(0.15)
+            # Hold the flag until the hook has seen the injected keys (no fixed 150 ms wait)
+            self._wait_for_injected_keys()
 
             print("Replacement complete")
 
@@ -3098,8 +3969,8 @@ class SmartKeyboardService:
                     exclude_uid=self.last_underline_id,
                 )
 
-            # Update document dictionary with the replacement
-            self.update_document_word(self.last_word, chosen_word)
+            # Update document dictionary with the replacement (shifts later positions)
+            self.update_document_word(self.last_word, chosen_word, position=pivot_index)
 
             # Remove the persistent underline for the OLD misspelled word
             removed = False
@@ -3118,9 +3989,9 @@ class SmartKeyboardService:
             self.last_underline_id = None
 
             # Clear buffers to prevent reprocessing the replaced word
-            self.current_word_chars = []
+            self.current_word_chars = _WordBuffer()
             self.cursor_index = 0
-            self.last_committed_word_chars = []
+            self.last_committed_word = ""
             self.pending_restore = False
             self.restore_allowed = False
             self.selection_anchor = None
@@ -3132,12 +4003,6 @@ class SmartKeyboardService:
             if need_refresh:
                 self._schedule_underlines_refresh(reason="post-replacement")
 
-            # Re-check all words from start to end in background
-            threading.Thread(
-                target=self.check_all_words_from_start_to_end,
-                daemon=True
-            ).start()
-
         except Exception as e:
             print(f"Replacement failed: {e}")
             self.just_replaced_word = False
@@ -3146,11 +4011,22 @@ class SmartKeyboardService:
             self.disable_scanning = False
             self.replacing = False
 
-    def on_press(self, key):
-        """Handle key press events"""
+    def on_press(self, key, snapshot: Optional[dict] = None):
+        """Handle key press events.
+
+        ``snapshot`` is the target-app state the hook read before the key reached
+        the app (see ``_snapshot_before_key``).
+        """
+        invalidate_caret_cache()
         try:
-            # Debug: print every key press
-            print(f"Key pressed: {key}, ctrl_held={getattr(self, 'ctrl_held', False)}, select_all_active={getattr(self, 'select_all_active', False)}")
+            debug = self.debug_keys
+            popup = self.popup
+            # Key members are special keys; anything else is a KeyCode with char/vk slots.
+            # pynput reports unidentified keys as None, which is treated like a special key.
+            is_special = key is None or isinstance(key, Key)
+            raw_char = None if is_special else key.char
+            if debug:
+                print(f"Key pressed: {key}, ctrl_held={getattr(self, 'ctrl_held', False)}, select_all_active={getattr(self, 'select_all_active', False)}")
             
             # Skip processing if we're in the middle of replacing
             if self.replacing:
@@ -3159,23 +4035,28 @@ class SmartKeyboardService:
             if self.disable_scanning:
                 return
 
+            # Read once; only this handler hides the popup while it runs
+            popup_visible = popup.visible
+
             if self.just_replaced_word and key not in (Key.backspace, Key.esc):
                 self.just_replaced_word = False
 
-            in_paste_cooldown = self._in_paste_cooldown()
+            now = time.monotonic()
+            in_paste_cooldown = self._in_paste_cooldown(now)
 
             # Track Shift key for selection handling
-            if key in (Key.shift, Key.shift_r):
+            if key in _SHIFT_KEYS:
                 self.shift_pressed = True
                 if self.selection_anchor is None:
                     self.selection_anchor = self.cursor_index
                 return
             
             # Detect Ctrl+V paste operation and Ctrl+A select-all
-            if key == Key.ctrl_l or key == Key.ctrl_r:
+            if key in _CTRL_KEYS:
                 self.clipboard_check_active = True
                 self.ctrl_held = True
-                print(f"Ctrl pressed - ctrl_held set to True")
+                if debug:
+                    print("Ctrl pressed - ctrl_held set to True")
             
             # Check for 'A' or 'V' key while Ctrl is held
             if self.ctrl_held:
@@ -3185,12 +4066,8 @@ class SmartKeyboardService:
                 is_x_key = False
                 
                 # Try multiple ways to detect the key
-                key_char = None
-                key_vk = None
-                if hasattr(key, 'char') and key.char:
-                    key_char = key.char.lower()
-                if hasattr(key, 'vk'):
-                    key_vk = key.vk
+                key_char = raw_char.lower() if raw_char else None
+                key_vk = None if is_special else key.vk
                 
                 # Also check the key name for KeyCode objects
                 key_name = None
@@ -3199,7 +4076,8 @@ class SmartKeyboardService:
                 except:
                     pass
                 
-                print(f"Checking key while Ctrl held: char={key_char}, vk={key_vk}, name={key_name}")
+                if debug:
+                    print(f"Checking key while Ctrl held: char={key_char}, vk={key_vk}, name={key_name}")
                 
                 if key_char == 'v' or key_vk == 86 or (key_name and 'v' in key_name):
                     is_v_key = True
@@ -3211,10 +4089,10 @@ class SmartKeyboardService:
                 if is_v_key:
                     self._start_paste_cooldown(0.8)
                     in_paste_cooldown = True
-                    self.capture_paste_anchor()
+                    self.capture_paste_anchor((snapshot or {}).get('paste_anchor'))
                     # Ctrl+V detected - schedule clipboard check after paste completes
                     print("Paste detected - checking clipboard...")
-                    threading.Timer(0.3, self.check_pasted_text).start()
+                    self._paste_q.put_nowait(now + self.paste_settle_delay)
                 
                 if is_a_key:
                     # Ctrl+A detected - mark select-all active
@@ -3223,13 +4101,14 @@ class SmartKeyboardService:
 
                 if is_x_key:
                     triggered_via_ctrl = self.select_all_active
-                    if self._should_clear_select_all():
+                    if self._should_clear_select_all(snapshot):
                         reason = "Ctrl+A" if triggered_via_ctrl else "Selection"
                         print(f"{reason} + Ctrl+X detected - clearing all underlines (interface: {self.current_interface})")
                         self._clear_all_underlines_notepad()
                         self.select_all_active = False
-                        if self.popup.visible:
-                            self.popup.hide()
+                        if popup_visible:
+                            popup.hide()
+                            popup_visible = False
                     else:
                         self._schedule_document_empty_check()
             
@@ -3242,45 +4121,42 @@ class SmartKeyboardService:
             # Handle Esc key - hide popup or exit if pressed twice quickly
             if key == Key.esc:
                 # record time of this Esc press
-                current_time = time.time()
+                current_time = now
                 # if second Esc within threshold -> stop service
                 if current_time - self.last_esc_time < 1.0:
                     print("\nEsc pressed twice - Stopping service...")
-                    self.running = False
                     try:
-                        self.popup.hide()
+                        popup.hide()
                     except Exception:
                         pass
-                    try:
-                        self.popup.root.quit()
-                    except Exception:
-                        pass
-                    self.last_esc_time = 0
+                    self.stop_service()
+                    self.last_esc_time = float("-inf")
                     return
 
                 # otherwise, set last_esc_time and hide popup if visible
                 self.last_esc_time = current_time
-                if self.popup.visible:
+                if popup_visible:
                     try:
-                        self.popup.hide()
+                        popup.hide()
                     except Exception:
                         pass
                 return
             
             # Navigation controls for popup (only handles list navigation/selection)
-            if self.popup.visible:
+            if popup_visible:
                 if key == Key.down:
-                    self.popup.select_next()
+                    popup.select_next()
                     return
                 elif key == Key.up:
-                    self.popup.select_prev()
+                    popup.select_prev()
                     return
                 elif key == Key.enter:
-                    print("Enter pressed - popup visible")
-                    chosen = self.popup.get_selected()
+                    if debug:
+                        print("Enter pressed - popup visible")
+                    chosen = popup.get_selected()
                     print(f"Selected suggestion: {chosen}")
                     if chosen:
-                        self.popup.hide()
+                        popup.hide()
                         self.replace_word(chosen)
                     else:
                         print("No suggestion selected")
@@ -3288,199 +4164,108 @@ class SmartKeyboardService:
 
             # Buffer-aware editing controls (apply whether popup is visible or not)
             if key == Key.backspace:
-                triggered_via_ctrl = self.select_all_active
-                if self._should_clear_select_all():
-                    reason = "Ctrl+A" if triggered_via_ctrl else "Selection"
-                    print(f"{reason} + Backspace detected - clearing all underlines (interface: {self.current_interface})")
-                    self._clear_all_underlines_notepad()
-                    self.select_all_active = False
-                    self.reset_current_word()
-                    if self.popup.visible:
-                        self.popup.hide()
-                    return
-                self._schedule_document_empty_check()
-                buffer_before_edit = ''.join(self.current_word_chars)
-                if self.trailing_delimiter_count > 0:
-                    self.trailing_delimiter_count = max(0, self.trailing_delimiter_count - 1)
-                    self.pending_restore = False
-                    print(f"Removed trailing delimiter (remaining: {self.trailing_delimiter_count})")
-                    if (self.trailing_delimiter_count == 0 and not self.current_word_chars
-                            and self.last_committed_word_chars and self.restore_allowed):
-                        self.current_word_chars = self.last_committed_word_chars.copy()
-                        self.cursor_index = len(self.current_word_chars)
-                        self.pending_restore = True
-                        self.restore_allowed = False
-                        # Update buffer_before_edit to reflect the restored word
-                        buffer_before_edit = ''.join(self.current_word_chars)
-                        print(f"Restored last word buffer '{buffer_before_edit}' before backspace")
-                    return
-                removal_checked = False
-                if self.pending_restore:
-                    # When deleting a restored word, use the current buffer as the word being deleted
-                    buffer_before_edit = ''.join(self.current_word_chars)
-                    # We restored the buffer on previous event; now perform actual deletion
-                    self.pending_restore = False
-                    self.restore_allowed = False
-                    if self.selection_range:
-                        start, end = self.selection_range
-                        removed = ''.join(self.current_word_chars[start:end])
-                        del self.current_word_chars[start:end]
-                        self.cursor_index = start
-                        print(f"Backspace cleared selection '{removed}' -> Buffer: {''.join(self.current_word_chars)} (cursor @ {self.cursor_index})")
-                        self.selection_range = None
-                        self.selection_anchor = None
-                        self.sync_committed_buffer()
-                    elif self.cursor_index > 0:
-                        removed_char = self.current_word_chars.pop(self.cursor_index - 1)
-                        self.cursor_index -= 1
-                        print(f"Backspace removed '{removed_char}' -> Buffer: {''.join(self.current_word_chars)} (cursor @ {self.cursor_index})")
-                        self.sync_committed_buffer()
-                    else:
-                        self.reset_current_word()
-                    removal_checked = True
-                elif self.selection_range:
-                    self.restore_allowed = False
-                    start, end = self.selection_range
-                    removed = ''.join(self.current_word_chars[start:end])
-                    del self.current_word_chars[start:end]
-                    self.cursor_index = start
-                    print(f"Backspace cleared selection '{removed}' -> Buffer: {''.join(self.current_word_chars)} (cursor @ {self.cursor_index})")
-                    self.selection_range = None
-                    self.selection_anchor = None
-                    self.sync_committed_buffer()
-                    removal_checked = True
-                elif self.cursor_index > 0:
-                    self.restore_allowed = False
-                    removed_char = self.current_word_chars.pop(self.cursor_index - 1)
-                    self.cursor_index -= 1
-                    print(f"Backspace removed '{removed_char}' -> Buffer: {''.join(self.current_word_chars)} (cursor @ {self.cursor_index})")
-                    self.sync_committed_buffer()
-                    removal_checked = True
-                elif not self.current_word_chars and self.last_committed_word_chars and self.restore_allowed:
-                    # Restore the last committed word so edits after clicking still have context
-                    self.current_word_chars = self.last_committed_word_chars.copy()
-                    self.cursor_index = len(self.current_word_chars)
-                    self.pending_restore = True
-                    self.restore_allowed = False
-                    print(f"Restored last word buffer '{''.join(self.current_word_chars)}' before backspace")
-                    return
-                else:
-                    self.reset_current_word()
-                    removal_checked = True
-                if removal_checked:
-                    removed = self._maybe_remove_underline_after_edit(buffer_before_edit)
-                    if removed:
-                        return
-                    if self.current_interface != "Notepad":
-                        if not removed and not self.current_word_chars and not buffer_before_edit.strip():
-                            self._remove_underlines_near_caret()
-                    self._schedule_refresh_if_needed("backspace-edit")
-                    if self.popup.visible:
-                        self.popup.hide()
-                    return
+                self._handle_backspace(popup, debug, snapshot)
+                return
 
             if key == Key.delete:
                 triggered_via_ctrl = self.select_all_active
-                if self._should_clear_select_all():
+                if self._should_clear_select_all(snapshot):
                     reason = "Ctrl+A" if triggered_via_ctrl else "Selection"
                     print(f"{reason} + Delete detected - clearing all underlines (interface: {self.current_interface})")
                     self._clear_all_underlines_notepad()
                     self.select_all_active = False
                     self.reset_current_word()
-                    if self.popup.visible:
-                        self.popup.hide()
+                    if popup_visible:
+                        popup.hide()
                     return
                 self._schedule_document_empty_check()
-                buffer_before_edit = ''.join(self.current_word_chars)
+                # Bound after the select-all path, which replaces the buffer via reset_current_word
+                buf = self.current_word_chars
+                cursor = self.cursor_index
+                selection = self.selection_range
+                buffer_before_edit = buf.as_str()
                 self.pending_restore = False
                 removal_checked = False
-                if self.selection_range:
+                if selection:
                     self.restore_allowed = False
-                    start, end = self.selection_range
-                    removed = ''.join(self.current_word_chars[start:end])
-                    del self.current_word_chars[start:end]
+                    start, end = selection
+                    removed = buf.delete(start, end)
                     self.cursor_index = start
-                    print(f"Delete cleared selection '{removed}' -> Buffer: {''.join(self.current_word_chars)} (cursor @ {self.cursor_index})")
+                    if debug:
+                        print(f"Delete cleared selection '{removed}' -> Buffer: {buf.as_str()} (cursor @ {start})")
                     self.selection_range = None
                     self.selection_anchor = None
                     removal_checked = True
-                elif self.cursor_index < len(self.current_word_chars):
+                elif cursor < len(buf):
                     self.restore_allowed = False
-                    removed_char = self.current_word_chars.pop(self.cursor_index)
-                    print(f"Delete removed '{removed_char}' -> Buffer: {''.join(self.current_word_chars)} (cursor @ {self.cursor_index})")
+                    removed_char = buf.pop(cursor)
+                    if debug:
+                        print(f"Delete removed '{removed_char}' -> Buffer: {buf.as_str()} (cursor @ {cursor})")
                     removal_checked = True
                 elif self.trailing_delimiter_count > 0:
                     self.trailing_delimiter_count = max(0, self.trailing_delimiter_count - 1)
-                    print(f"Consumed trailing delimiter with Delete (remaining: {self.trailing_delimiter_count})")
+                    if debug:
+                        print(f"Consumed trailing delimiter with Delete (remaining: {self.trailing_delimiter_count})")
                 else:
                     # Nothing to delete in buffer; ensure we don't leave stale underline when buffer already empty
                     removal_checked = True
                 if removal_checked:
-                    removed = self._maybe_remove_underline_after_edit(buffer_before_edit)
+                    self._buffer_dirty = True
+                    buffer_after_edit = buf.as_str()
+                    removed = self._maybe_remove_underline_after_edit(
+                        buffer_before_edit, buffer_after_edit, snapshot
+                    )
                     if removed:
                         return
                     if self.current_interface != "Notepad":
-                        if not removed and not self.current_word_chars and not buffer_before_edit.strip():
-                            self._remove_underlines_near_caret()
+                        if not buffer_after_edit and not buffer_before_edit.strip():
+                            self._remove_underlines_near_caret(caret_pos=(snapshot or {}).get('caret_pos'))
                     self._schedule_refresh_if_needed("delete-edit")
-                    if self.popup.visible:
-                        self.popup.hide()
+                    if popup_visible:
+                        popup.hide()
                     return
 
-            if key == Key.left:
-                self.pending_restore = False
-                self.restore_allowed = False
-                prev_index = self.cursor_index
-                if self.cursor_index > 0:
-                    self.cursor_index -= 1
-                if self.shift_pressed:
-                    if self.selection_anchor is None:
-                        self.selection_anchor = prev_index
-                    start = min(self.cursor_index, self.selection_anchor)
-                    end = max(self.cursor_index, self.selection_anchor)
-                    self.selection_range = (start, end)
-                    print(f"Selection range {self.selection_range}")
-                else:
-                    self.selection_anchor = None
-                    self.selection_range = None
-                    print(f"Cursor moved left -> index {self.cursor_index}")
-                return
-
-            if key == Key.right:
+            if key == Key.left or key == Key.right:
                 self.pending_restore = False
                 self.restore_allowed = False
-                prev_index = self.cursor_index
-                if self.cursor_index < len(self.current_word_chars):
-                    self.cursor_index += 1
+                prev_index = cursor = self.cursor_index
+                if key == Key.left:
+                    if cursor > 0:
+                        cursor -= 1
+                elif cursor < len(self.current_word_chars):
+                    cursor += 1
+                self.cursor_index = cursor
                 if self.shift_pressed:
-                    if self.selection_anchor is None:
-                        self.selection_anchor = prev_index
-                    start = min(self.cursor_index, self.selection_anchor)
-                    end = max(self.cursor_index, self.selection_anchor)
-                    self.selection_range = (start, end)
-                    print(f"Selection range {self.selection_range}")
+                    anchor = self.selection_anchor
+                    if anchor is None:
+                        anchor = self.selection_anchor = prev_index
+                    self.selection_range = (min(cursor, anchor), max(cursor, anchor))
+                    if debug:
+                        print(f"Selection range {self.selection_range}")
                 else:
                     self.selection_anchor = None
                     self.selection_range = None
-                    print(f"Cursor moved right -> index {self.cursor_index}")
+                    if debug:
+                        direction = "left" if key == Key.left else "right"
+                        print(f"Cursor moved {direction} -> index {cursor}")
                 return
 
-            if key in [Key.up, Key.down, Key.home, Key.end, Key.page_up, Key.page_down]:
+            if key in _NAV_KEYS:
                 self.pending_restore = False
                 self.reset_current_word()
-                if self.popup.visible:
-                    self.popup.hide()
+                if popup_visible:
+                    popup.hide()
                 return
 
             # Handle normal characters
             char = None
-            if hasattr(key, 'char'):
-                char = key.char
+            if not is_special:
+                char = raw_char
             elif key == Key.space:
                 char = ' '
             elif key == Key.enter:
                 # Don't treat Enter as delimiter if popup is visible (it's for selection)
-                if not self.popup.visible:
+                if not popup_visible:
                     char = '\n'
             elif key == Key.tab:
                 char = '\t'
@@ -3489,110 +4274,416 @@ class SmartKeyboardService:
             if char and self.select_all_active:
                 self.select_all_active = False
 
-            if char and self.is_word_delimiter(char):
+            if char and char in self._DELIMS:
                 self.pending_restore = False
                 self.last_delimiter_char = char
                 self.trailing_delimiter_count += 1
                 # Always check and hide popup, even if word is empty
-                word = ''.join(self.current_word_chars) if self.current_word_chars else ""
-                if self.current_word_chars:
-                    self.last_committed_word_chars = self.current_word_chars.copy()
+                buf = self.current_word_chars
+                word = buf.as_str()
+                if word:
+                    self.last_committed_word = word
 
-                if self.current_word_chars and self.enabled and not self.replacing:
-                    print(f"Buffer at delimiter: {self.current_word_chars} (cursor @ {self.cursor_index}) -> Word: '{word}'")
+                # Re-tested here: the paste worker sets replacing while it places underlines
+                if word and self.enabled and not self.replacing:
+                    if debug:
+                        print(f"Buffer at delimiter: {word!r} (cursor @ {self.cursor_index}) -> Word: '{word}'")
 
                     if in_paste_cooldown:
-                        print("Skipping keystroke-based check during paste cooldown")
-                        self.popup.hide()
+                        if debug:
+                            print("Skipping keystroke-based check during paste cooldown")
+                        if popup_visible:
+                            popup.hide()
                     else:
                         # Check if this is the word we just replaced (within 0.5 seconds)
-                        time_since_replacement = time.time() - self.last_replacement_time
-                        if word == self.last_replaced_word and time_since_replacement < 0.5:
-                            print(f"Skipping check - just replaced this word")
-                            self.popup.hide()
+                        time_since_replacement = now - self.last_replacement_time
+                        if (time_since_replacement < 0.5
+                                and _canonical_word(word) == self.last_replaced_word):
+                            if debug:
+                                print("Skipping check - just replaced this word")
+                            if popup_visible:
+                                popup.hide()
                             self.last_replaced_word = ""  # Clear it
+                        elif not self._buffer_dirty and word == self.last_word:
+                            # Restored word re-committed unchanged; its underline is still current
+                            if popup_visible:
+                                popup.hide()
                         else:
                             self.last_word = word  # Store the word for replacement
                             self.words_checked += 1
-                            suggestions, had_error = self.get_suggestions(word)
-                            if had_error:
-                                has_suggestions = len(suggestions) > 0
-                                # Add persistent underline that stays until word is corrected
-                                underline_id = self.show_no_suggestion_marker(
-                                    word,
-                                    has_suggestions=has_suggestions,
-                                    suggestions=suggestions
-                                )
-                                if suggestions:
-                                    if underline_id:
-                                        self.last_underline_id = underline_id
-                                    self.popup.hide()
-                                else:
-                                    if underline_id:
-                                        # reset so unrelated words don't reuse the id
-                                        self.last_underline_id = underline_id
-                                    self.popup.hide()
-                            else:
-                                # Word is correct - remove any existing underline for this word
-                                caret_index = self._get_caret_char_index()
-                                fallback_index = None
-                                if caret_index is not None and len(word) > 1:
-                                    fallback_index = max(0, caret_index - 1)
-                                self.remove_persistent_underline(
-                                    word,
-                                    char_index=caret_index,
-                                    fallback_index=fallback_index,
-                                )
-                                self.popup.hide()
+                            if popup_visible:
+                                popup.hide()
+                            self._schedule_check(word, (snapshot or {}).get('commit_geometry'))
+                            self._buffer_dirty = False
                 else:
                     # Hide popup if no word was typed (multiple spaces, etc.)
-                    self.popup.hide()
+                    if popup_visible:
+                        popup.hide()
                 # Always clear buffer after delimiter
                 self.reset_current_word(preserve_delimiter=True, clear_marker=False)
                 if char == ' ' and self.current_interface == "Microsoft Word":
                     try:
-                        self.popup.root.after(60, self._cleanup_word_whitespace_after_space)
+                        popup.root.after(60, self._cleanup_word_whitespace_after_space)
                     except Exception:
                         threading.Thread(target=self._cleanup_word_whitespace_after_space, daemon=True).start()
             elif char:
-                self.pending_restore = False
-                self.restore_allowed = False
-                # Hide popup while actively typing a new word
-                if self.popup.visible:
-                    self.popup.hide()
-                if self.selection_range:
-                    start, end = self.selection_range
-                    removed = ''.join(self.current_word_chars[start:end])
-                    del self.current_word_chars[start:end]
-                    self.cursor_index = start
-                    print(f"Replacing selection '{removed}' before inserting '{char}'")
-                    self.selection_range = None
-                    self.selection_anchor = None
-                self.current_word_chars.insert(self.cursor_index, char)
-                self.cursor_index += 1
-                self.trailing_delimiter_count = 0
-                if len(self.current_word_chars) > 50:
-                    # Keep last 50 chars and adjust cursor index accordingly
-                    overflow = len(self.current_word_chars) - 50
-                    if overflow > 0:
-                        self.current_word_chars = self.current_word_chars[overflow:]
-                        self.cursor_index = max(0, self.cursor_index - overflow)
-                else:
-                    # Clear selection state after normal typing
-                    self.selection_anchor = None
-                    self.selection_range = None
-                print(f"Typed '{char}' -> Buffer: {''.join(self.current_word_chars)} (cursor @ {self.cursor_index})")
-                self._schedule_refresh_if_needed("typing-insert")
-        except Exception:
-            pass
+                self._insert_typed_chars(char)
+        except Exception as exc:
+            self._log_key_exception(f"on_press({key})", exc)
+
+    def _log_key_exception(self, where: str, exc: Exception):
+        """Remember a key-handler failure without writing to stdout on the key path."""
+        self._key_error_count += 1
+        self._key_errors.append(f"{where}: {type(exc).__name__}: {exc}")
+
+    def _log_paste_exception(self, where: str, exc: Exception):
+        """Count a paste-path failure; print the first and every 16th, tracebacks only in debug."""
+        self._paste_error_count += 1
+        count = self._paste_error_count
+        if count == 1 or count % 16 == 0:
+            print(f"Error {where}: {exc} ({count} paste error(s) so far)")
+        if self.debug_keys:
+            import traceback
+            traceback.print_exc()
+
+    def _report_key_errors(self):
+        """Print the key-handler and paste failures collected during this session."""
+        if self._paste_error_count:
+            print(f"\n{self._paste_error_count} paste error(s) this session")
+        if not self._key_error_count:
+            return
+        print(f"\n{self._key_error_count} key handler error(s); most recent:")
+        for entry in self._key_errors:
+            print(f"   {entry}")
+
+    def _handle_backspace(self, popup, debug: bool, snapshot: Optional[dict] = None):
+        """Apply one Backspace to the tracked word: at most one buffer mutation per call."""
+        triggered_via_ctrl = self.select_all_active
+        if self._should_clear_select_all(snapshot):
+            reason = "Ctrl+A" if triggered_via_ctrl else "Selection"
+            print(f"{reason} + Backspace detected - clearing all underlines (interface: {self.current_interface})")
+            self._clear_all_underlines_notepad()
+            self.select_all_active = False
+            self.reset_current_word()
+            if popup.visible:
+                popup.hide()
+            return
+        self._schedule_document_empty_check()
+        buf = self.current_word_chars
+        # When deleting a restored word (pending_restore), this snapshot already holds it
+        buffer_before_edit = buf.as_str()
+
+        if self.trailing_delimiter_count > 0:
+            self.trailing_delimiter_count -= 1
+            self.pending_restore = False
+            if debug:
+                print(f"Removed trailing delimiter (remaining: {self.trailing_delimiter_count})")
+            if (self.trailing_delimiter_count == 0 and not buffer_before_edit
+                    and self.last_committed_word and self.restore_allowed):
+                self._restore_committed_word(debug)
+            return
+
+        if self.selection_range:
+            start, end = self.selection_range
+            removed = buf.delete(start, end)
+            self.cursor_index = start
+            self.selection_range = None
+            self.selection_anchor = None
+            if debug:
+                print(f"Backspace cleared selection '{removed}' -> Buffer: {buf.as_str()} (cursor @ {start})")
+        elif self.cursor_index > 0:
+            self.cursor_index -= 1
+            removed_char = buf.pop(self.cursor_index)
+            if debug:
+                print(f"Backspace removed '{removed_char}' -> Buffer: {buf.as_str()} (cursor @ {self.cursor_index})")
+        elif not buffer_before_edit and self.last_committed_word and self.restore_allowed:
+            # Restore the last committed word so edits after clicking still have context
+            self._restore_committed_word(debug)
+            return
+        else:
+            self.reset_current_word()
+            buf = None
+        self.pending_restore = False
+        self.restore_allowed = False
+        if buf is not None:
+            self.sync_committed_buffer()
+
+        self._buffer_dirty = True
+        buffer_after_edit = self.current_word_chars.as_str()
+        if self._maybe_remove_underline_after_edit(buffer_before_edit, buffer_after_edit, snapshot):
+            return
+        if self.current_interface != "Notepad":
+            if not buffer_after_edit and not buffer_before_edit.strip():
+                self._remove_underlines_near_caret(caret_pos=(snapshot or {}).get('caret_pos'))
+        self._schedule_refresh_if_needed("backspace-edit")
+        if popup.visible:
+            popup.hide()
+
+    def _restore_committed_word(self, debug: bool):
+        """Reload the last committed word so the next Backspace edits it in place."""
+        self.current_word_chars = _WordBuffer(self.last_committed_word)
+        self.cursor_index = len(self.last_committed_word)
+        self.pending_restore = True
+        self.restore_allowed = False
+        if debug:
+            print(f"Restored last word buffer '{self.last_committed_word}' before backspace")
+
+    def _insert_typed_chars(self, chars: str):
+        """Insert one or more typed (non-delimiter) characters at the cursor."""
+        invalidate_caret_cache()
+        if self.select_all_active:
+            self.select_all_active = False
+        self.pending_restore = False
+        self.restore_allowed = False
+        # Hide popup while actively typing a new word
+        popup = self.popup
+        if popup.visible:
+            popup.hide()
+        buf = self.current_word_chars
+        cursor = self.cursor_index
+        if self.selection_range:
+            start, end = self.selection_range
+            removed = buf.delete(start, end)
+            cursor = start
+            if self.debug_keys:
+                print(f"Replacing selection '{removed}' before inserting '{chars}'")
+            self.selection_range = None
+            self.selection_anchor = None
+        buf.insert(cursor, chars)
+        cursor += len(chars)
+        self._buffer_dirty = True
+        self.trailing_delimiter_count = 0
+        # Keep last 50 chars and adjust cursor index accordingly
+        overflow = buf.trim_front(50)
+        if overflow:
+            cursor = max(0, cursor - overflow)
+        else:
+            # Clear selection state after normal typing
+            self.selection_anchor = None
+            self.selection_range = None
+        self.cursor_index = cursor
+        if self.debug_keys:
+            print(f"Typed '{chars}' -> Buffer: {buf.as_str()} (cursor @ {cursor})")
+        self._schedule_refresh_if_needed("typing-insert")
+
+    def _key_event_worker(self):
+        """Drain queued key events in batches so the pynput hook returns immediately."""
+        while self.running:
+            try:
+                batch = [self._key_q.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.key_batch_size:
+                try:
+                    batch.append(self._key_q.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply_key_batch(batch)
+
+    def _apply_key_batch(self, batch: List[Tuple[str, object, Optional[dict]]]):
+        """Replay a batch of key events, collapsing runs of plain characters into one insert."""
+        typed: List[str] = []
+        delims = self._DELIMS
+
+        def flush_typed():
+            if not typed:
+                return
+            chars = ''.join(typed)
+            typed.clear()
+            try:
+                self._insert_typed_chars(chars)
+            except Exception as exc:
+                self._log_key_exception(f"insert({chars!r})", exc)
+
+        for kind, key, snapshot in batch:
+            if not self.running:
+                return
+            if kind == 'replace':
+                flush_typed()
+                self.replace_word(key)
+                continue
+            if kind == 'press':
+                char = None if key is None or isinstance(key, Key) else key.char
+                if (char and char not in delims and not self.ctrl_held
+                        and not self.replacing and not self.disable_scanning):
+                    self.just_replaced_word = False
+                    typed.append(char)
+                    continue
+                flush_typed()
+                self.on_press(key, snapshot)
+            elif key in _MODIFIER_KEYS:
+                # Other releases are no-ops in on_release
+                flush_typed()
+                self.on_release(key)
+        flush_typed()
     
+    def _snapshot_before_key(self, key) -> Optional[dict]:
+        """Read the target-app state a key is about to change; runs inside the hook.
+
+        The hook returns before the worker's on_press runs, by which time the app
+        has already pasted, deleted or moved past a delimiter, so the paste anchor,
+        full-document selection, caret and commit geometry are taken here and
+        queued with the event.
+        """
+        if key in _CTRL_KEYS:
+            self._hook_ctrl_down = True
+            return None
+        if key == Key.backspace or key == Key.delete:
+            return self._snapshot_before_delete(key)
+        if key == Key.space or key == Key.enter or key == Key.tab:
+            return {'commit_geometry': self._capture_commit_geometry()}
+        if key is None or isinstance(key, Key):
+            return None
+        if not self._hook_ctrl_down:
+            if key.char and key.char in self._DELIMS:
+                return {'commit_geometry': self._capture_commit_geometry()}
+            return None
+        char = key.char.lower() if key.char else None
+        if char in ('v', '\x16') or key.vk == 86:
+            return {'paste_anchor': self._capture_live_geometry()}
+        if char in ('x', '\x18') or key.vk == 88:
+            return {'full_selection': self._has_full_document_selection()}
+        return None
+
+    def _snapshot_before_delete(self, key) -> dict:
+        """Selection, caret and post-edit caret index for a Backspace/Delete, read in the hook."""
+        snapshot = {'full_selection': self._has_full_document_selection()}
+        try:
+            snapshot['caret_pos'] = get_caret_position()
+        except Exception:
+            snapshot['caret_pos'] = None
+        caret_index = None
+        try:
+            selection = self._get_caret_selection()
+        except Exception:
+            selection = None
+        if selection:
+            start, end = min(selection), max(selection)
+            if start != end:
+                caret_index = start
+            elif key == Key.backspace:
+                caret_index = max(0, end - 1)
+            else:
+                caret_index = end
+        snapshot['caret_index'] = caret_index
+        return snapshot
+
+    def _schedule_check(self, word: str, geometry: Optional[dict] = None):
+        """Hand a committed word to the suggestion worker without blocking the hook.
+
+        geometry is the commit geometry the hook took before the delimiter reached
+        the app; without it the caret is read now.
+        """
+        if not _has_kannada(word):
+            # Non-Kannada tokens can never be flagged, so skip the whole pipeline
+            return
+        if geometry is None:
+            geometry = self._capture_commit_geometry()
+        self._check_q.put_nowait((word, geometry))
+
+    def _capture_commit_geometry(self) -> Optional[dict]:
+        """Snapshot caret, window and character index for a word being committed."""
+        try:
+            geometry = self._capture_live_geometry()
+        except Exception:
+            return None
+        hwnd = geometry.get('hwnd')
+        try:
+            geometry['tracker_caret_rect'] = (
+                self.caret_tracker.get_caret_rect(hwnd) if self.caret_tracker and hwnd else None
+            )
+        except Exception:
+            geometry['tracker_caret_rect'] = None
+        try:
+            geometry['caret_index'] = self._get_caret_char_index()
+        except Exception:
+            geometry['caret_index'] = None
+        return geometry
+
+    def _suggestion_worker(self):
+        """Spell-check committed words once each typing burst settles."""
+        q = self._check_q
+        while self.running:
+            try:
+                first = q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            items = [first]
+            # Debounce: keep collecting until the burst pauses
+            while True:
+                try:
+                    items.append(q.get(timeout=self.check_debounce_delay))
+                except queue.Empty:
+                    break
+            for word, geometry in items:
+                if not self.enabled or not self.running:
+                    break
+                try:
+                    self._check_committed_word(word, geometry)
+                except Exception as exc:
+                    print(f"Spell check failed for '{word}': {exc}")
+
+    def _paste_check_worker(self):
+        """Run check_pasted_text once each queued paste has had time to land."""
+        q = self._paste_q
+        while self.running:
+            try:
+                due = q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            # Coalesce a burst of pastes into one check after the latest has settled
+            while True:
+                wait = due - time.monotonic()
+                try:
+                    due = max(due, q.get(timeout=wait) if wait > 0 else q.get_nowait())
+                except queue.Empty:
+                    break
+            if not self.running:
+                break
+            self.check_pasted_text()
+
+    def _check_committed_word(self, word: str, geometry: Optional[dict] = None):
+        """Underline a committed word if misspelled, or clear a stale underline.
+
+        geometry is the commit-time snapshot from _schedule_check; without it the
+        live caret is used.
+        """
+        # _schedule_check only queues words that passed the Kannada prefilter. This runs on
+        # the suggestion worker, so the lookup is allowed to finish: a timeout here would
+        # leave a slow misspelled word without its underline.
+        suggestions, had_error = self.get_suggestions(word, known_kannada=True)
+        if had_error:
+            # Add persistent underline that stays until word is corrected
+            underline_id = self.show_no_suggestion_marker(
+                word,
+                has_suggestions=bool(suggestions),
+                suggestions=suggestions,
+                geometry=geometry,
+            )
+            if underline_id:
+                self.last_underline_id = underline_id
+        else:
+            # Word is correct - remove any existing underline for this word
+            if geometry is not None:
+                caret_index = geometry.get('caret_index')
+            else:
+                caret_index = self._get_caret_char_index()
+            fallback_index = None
+            if caret_index is not None and len(word) > 1:
+                fallback_index = max(0, caret_index - 1)
+            self.remove_persistent_underline(
+                word,
+                char_index=caret_index,
+                fallback_index=fallback_index,
+            )
+
     def on_release(self, key):
         """Handle key release events"""
         # Reset clipboard check flag and ctrl_held when Ctrl is released
-        if key == Key.ctrl_l or key == Key.ctrl_r:
+        if key in _CTRL_KEYS:
             self.clipboard_check_active = False
             self.ctrl_held = False
-        if key in (Key.shift, Key.shift_r):
+        if key in _SHIFT_KEYS:
             self.shift_pressed = False
             # Keep selection range (text remains highlighted) but clear anchor
             self.selection_anchor = None
@@ -3602,17 +4693,49 @@ class SmartKeyboardService:
         self.enabled = not self.enabled
         status = "ENABLED" if self.enabled else "DISABLED"
         print(f"\nSuggestion mode {status}")
+        # Toggling is the user's reset switch; start from fresh suggestions afterwards
+        self.clear_suggestion_cache()
         if not self.enabled:
             self.popup.hide()
     
     def on_popup_close(self):
         """Handle popup window close"""
-        self.running = False
         print("\nExiting service...")
+        self.stop_service()
+
+    def stop_service(self):
+        """Stop the service from any thread; Tk teardown is posted to the UI thread."""
+        self.running = False
+        if sys.version_info >= (3, 9):
+            self._suggestion_pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            # cancel_futures is 3.9+; queued lookups are short and their threads are reaped at exit
+            self._suggestion_pool.shutdown(wait=False)
+        try:
+            self.popup.root.after(0, self._shutdown_ui)
+        except Exception:
+            pass
+
+    def _shutdown_ui(self):
+        """Stop the input listeners and leave the Tk mainloop (UI thread only)."""
+        if self._ui_shutdown_done:
+            return
+        self._ui_shutdown_done = True
+        for listener in (self._keyboard_listener, self._mouse_listener):
+            if listener is not None:
+                listener.stop()
+        # Destroy Grammarly-style overlay
+        try:
+            self.underline_overlay.destroy()
+        except Exception:
+            pass
+        self.active_overlay_hwnd = None
+        self.popup.root.destroy()
     
     def run(self):
         """Start the keyboard monitoring service"""
         self.running = True
+        start_foreground_hook()
         self._start_interface_monitor()
         
         def on_activate_toggle():
@@ -3631,51 +4754,65 @@ class SmartKeyboardService:
         
         def on_key_press(key):
             for_canonical(toggle_hotkey.press)(key)
-            if self.running:
-                self.on_press(key)
+            if self.replacing:
+                # Our own injected keys; on_press would ignore them anyway
+                self._injected_activity.set()
+            elif self.running:
+                snapshot = None
+                try:
+                    snapshot = self._snapshot_before_key(key)
+                except Exception as exc:
+                    self._log_key_exception(f"snapshot({key})", exc)
+                self._key_q.put_nowait(('press', key, snapshot))
         
         def on_key_release(key):
             for_canonical(toggle_hotkey.release)(key)
+            if key in _CTRL_KEYS:
+                self._hook_ctrl_down = False
+            if self.replacing:
+                self._injected_activity.set()
+            # Releases only clear modifier state, so they are replayed even mid-replacement
             if self.running:
-                self.on_release(key)
+                self._key_q.put_nowait(('release', key, None))
         
+        self._key_worker = threading.Thread(target=self._key_event_worker, daemon=True)
+        self._key_worker.start()
+        self._check_worker = threading.Thread(target=self._suggestion_worker, daemon=True)
+        self._check_worker.start()
+        self._paste_worker = threading.Thread(target=self._paste_check_worker, daemon=True)
+        self._paste_worker.start()
+
         listener = kb.Listener(on_press=on_key_press, on_release=on_key_release)
         listener.start()
+        self._keyboard_listener = listener
         
         # Start mouse listener to detect clicks on underlined words
         mouse_listener = mouse.Listener(on_click=self.on_mouse_click)
         mouse_listener.start()
+        self._mouse_listener = mouse_listener
         print("Mouse click detection enabled - click on underlined words to see suggestions")
         
-        # Add periodic check to keep UI responsive
-        def check_running():
-            if self.running:
-                self.popup.root.after(100, check_running)
-            else:
-                listener.stop()
-                mouse_listener.stop()
-                # Destroy Grammarly-style overlay
-                try:
-                    self.underline_overlay.destroy()
-                except Exception:
-                    pass
-                self.active_overlay_hwnd = None
-                self.popup.root.destroy()
-        
-        self.popup.root.after(100, check_running)
-        
+        # Shutdown is event-driven: stop_service() posts _shutdown_ui to this loop
         try:
             self.popup.root.mainloop()  # keep Tkinter UI active
         except Exception as e:
             print(f"\nService stopped: {e}")
         finally:
             self.running = False
+            # Drop words still waiting for the suggestion worker
+            while True:
+                try:
+                    self._check_q.get_nowait()
+                except queue.Empty:
+                    break
             # Clean up all persistent underlines
             self.cleanup_all_underlines()
+            stop_foreground_hook()
             if listener.running:
                 listener.stop()
             if mouse_listener.running:
                 mouse_listener.stop()
+            self._report_key_errors()
             print("\nService stopped successfully\n")
     
     def cleanup_all_underlines(self):
@@ -3691,6 +4828,7 @@ class SmartKeyboardService:
         
         with self.underline_lock:
             self.misspelled_words.clear()
+            self._grid_clear()
         print("All underlines cleaned up")
 
 